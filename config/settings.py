@@ -24,11 +24,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'users.instrumentation.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.middleware.JWTAccessControlMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -61,22 +63,116 @@ DATABASES = {
     }
 }
 
+# Role policy enforced by users.middleware.JWTAccessControlMiddleware:
+# (path prefix, allowed roles), longest prefix wins, None marks a public path
+JWT_ACCESS_POLICY = [
+    ('/api/register/', None),
+    ('/api/login/', None),
+    ('/api/token/', None),
+    ('/admin/', None),
+    ('/swagger/', None),
+    ('/redoc/', None),
+    ('/api/admin/', ['admin']),
+    ('/api/editor/', ['editor', 'admin']),
+    ('/api/async/admin/', ['admin']),
+    ('/api/async/editor/', ['editor', 'admin']),
+    ('/metrics', ['admin']),
+]
+
+# Cache (dashboard snapshots and their single-flight locks live here). Use a
+# shared backend such as Redis or Memcached when running several workers.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Shared approved-posts feed pages. Local memory is per process; switch to
+    # 'django.core.cache.backends.filebased.FileBasedCache' (LOCATION a shared
+    # directory) or a shared-memory store to share pages across workers.
+    'feed': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'feed',
+    },
+}
+
+# Approved-posts feed cache (see posts.cache)
+FEED_CACHE_ALIAS = 'feed'
+FEED_CACHE_ROLES = ['user']
+FEED_CACHE_TIMEOUT = 300
+
+# Admin dashboard snapshot: always recompute after MAX_AGE seconds, and after
+# a user/post change at most once every MIN_REFRESH seconds. With no snapshot
+# yet, workers that lose the refresh lock wait up to COLD_WAIT seconds for it
+ADMIN_DASHBOARD_MAX_AGE = 300
+ADMIN_DASHBOARD_MIN_REFRESH = 5
+ADMIN_DASHBOARD_COLD_WAIT = 5
+
+# Characters of post content returned as the excerpt in list endpoints
+POST_EXCERPT_LENGTH = 200
+
+# Most post ids accepted by one bulk moderation request
+POST_BULK_MODERATION_MAX = 5000
+
+# Moderation leases: default/maximum lease length in seconds and posts per claim
+POST_CLAIM_LEASE_SECONDS = 300
+POST_CLAIM_MAX_LEASE_SECONDS = 3600
+POST_CLAIM_MAX = 50
+
+# Moderation event stream (posts.events): broker class carrying events between
+# workers, per-subscriber queue bound, and SSE keep-alive interval in seconds
+MODERATION_EVENT_BROKER = 'posts.events.LocalBroker'
+MODERATION_EVENT_QUEUE_SIZE = 100
+MODERATION_EVENT_HEARTBEAT = 15
+
+# Delta sync (posts.changes): rows per response, seconds a change must age
+# before it is served (covers in-flight transactions), and tombstone lifetime
+POST_CHANGES_PAGE_SIZE = 500
+POST_CHANGES_SETTLE_SECONDS = 2
+POST_TOMBSTONE_RETENTION_DAYS = 30
+
+# Request instrumentation (users.instrumentation.PerformanceMiddleware): SQL
+# queries allowed per request before a likely N+1 is logged, by URL name
+PERF_INSTRUMENTATION_ENABLED = True
+PERF_INSTRUMENTATION_PREFIX = '/api/'
+PERF_DEFAULT_QUERY_BUDGET = 20
+PERF_QUERY_BUDGETS = {
+    'post_list': 4,
+    'post_detail': 7,  # edits add the savepoint pair and locked status read in Post.save()
+    'post_changes': 4,
+    'user_profile': 3,
+    'admin_profiles': 4,
+    'admin_dashboard': 4,
+    'editor_dashboard': 10,  # a first visit rebuilds the author's counters
+    'pending_posts': 4,
+}
+
+# Prometheus metrics (users.metrics), served to admins at /metrics. Set a
+# directory shared by all gunicorn workers to report their combined totals
+METRICS_MULTIPROCESS_DIR = None
+METRICS_FLUSH_INTERVAL = 5
+
 # Custom User Model
 AUTH_USER_MODEL = 'users.User'
 
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # Use 'users.authentication.ClaimsJWTAuthentication' to build request.user
+        # from token claims instead of loading the user row on every request
+        'users.authentication.VersionedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        # JSONRenderer that reports its time as Server-Timing 'serialize'
+        'users.instrumentation.TimedJSONRenderer',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    # Trusted reverse proxies in front of the app. Throttles key clients on
+    # REMOTE_ADDR at 0; set the proxy count so they read X-Forwarded-For
+    # without trusting client-supplied entries
+    'NUM_PROXIES': 0,
 }
 
 # JWT Configuration
@@ -95,8 +191,50 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_EXP_CLAIM': 'refresh_exp',
     'SLIDING_TOKEN_LIFETIME': timedelta(minutes=60),
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=7),
+    'AUTH_TOKEN_CLASSES': ('users.tokens.CachedAccessToken',),
     'TOKEN_OBTAIN_SERIALIZER': 'users.serializers.CustomTokenObtainPairSerializer',
-    'TOKEN_REFRESH_SERIALIZER': 'rest_framework_simplejwt.serializers.TokenRefreshSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializers.CustomTokenRefreshSerializer',
+}
+
+# Token version revocation (seconds a user's token version is cached in-process)
+TOKEN_VERSION_CACHE_TTL = 30
+TOKEN_VERSION_CACHE_SIZE = 10000
+
+# In-process Bloom filter of blacklisted refresh token jtis. It syncs new
+# blacklist rows when the revocation version in CACHE_ALIAS changes (use a
+# shared cache with several workers) or after SYNC_INTERVAL seconds. Blacklist
+# ids not seen yet are re-checked for GAP_SECONDS (longer than any write
+# transaction)
+REVOKED_JTI_FILTER_ENABLED = True
+REVOKED_JTI_FILTER_CAPACITY = 1_000_000
+REVOKED_JTI_FILTER_ERROR_RATE = 0.01
+REVOKED_JTI_FILTER_CACHE_ALIAS = 'default'
+REVOKED_JTI_FILTER_SYNC_INTERVAL = 1
+REVOKED_JTI_FILTER_GAP_SECONDS = 60
+REVOKED_JTI_FILTER_REBUILD_INTERVAL = 3600
+
+# Verified access token payloads cached per process until each token's exp
+VERIFIED_TOKEN_CACHE_SIZE = 10000
+
+# Bulk user provisioning (users.provisioning): rows inserted per bulk_create
+# batch, and processes the provision_users command hashes passwords with
+# (None = CPU count, 1 = inline). The API endpoint hashes inline, so it takes
+# at most MAX_ROWS rows per request; larger batches go through the command
+USER_PROVISIONING_BATCH_SIZE = 500
+USER_PROVISIONING_WORKERS = None
+USER_PROVISIONING_MAX_ROWS = 50
+
+# Login/registration throttling (users.throttling): token buckets per view
+# throttle_scope as (burst requests, refill seconds) per client IP and per
+# submitted email. Use 'users.throttling.CacheBucketStore' to keep buckets in
+# THROTTLE_CACHE_ALIAS, shared across workers; the local store holds at most
+# THROTTLE_MAX_BUCKETS live buckets per kind and process, then refuses new keys
+THROTTLE_STORE = 'users.throttling.LocalBucketStore'
+THROTTLE_CACHE_ALIAS = 'default'
+THROTTLE_MAX_BUCKETS = 100000
+THROTTLE_BUCKETS = {
+    'login': {'ip': (30, 60), 'email': (10, 60)},
+    'register': {'ip': (10, 600)},
 }
 
 # Swagger Settings
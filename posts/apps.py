@@ -4,3 +4,6 @@ class PostsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'posts'
     verbose_name = 'Posts Management'
+    
+    def ready(self):
+        import posts.signals
@@ -0,0 +1,110 @@
+import json
+import time
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework import exceptions, permissions
+from users.async_api import async_api_view, json_response, not_modified, with_validators
+from users.pagination import PostCursorPagination
+from .cache import acache_feed_page, aget_cached_feed_page, aget_feed_version, is_feed_cacheable
+from .events import OVERFLOW, hub
+from .models import Post
+from .serializers import PostListSerializer, PostSerializer
+from .views import feed_page_etag, post_validators, visible_posts
+
+@async_api_view([permissions.IsAuthenticated])
+async def post_list(request):
+    """Async ``PostListView``: same payload, cursors, ETags and feed cache"""
+    cacheable = is_feed_cacheable(request)
+    version = await aget_feed_version() if cacheable else None
+    page = await aget_cached_feed_page(request, version) if cacheable else None
+    
+    if page is None:
+        paginator = PostCursorPagination()
+        queryset = PostListSerializer.optimize_queryset(visible_posts(request.user), request)
+        posts = await paginator.apaginate_queryset(queryset, request)
+        
+        etag = feed_page_etag(request, paginator.count, posts)
+        unchanged = not_modified(request, etag)
+        if unchanged is not None:
+            return unchanged
+        
+        serializer = PostListSerializer(posts, many=True, context={'request': request})
+        page = {'etag': etag, 'data': paginator.get_paginated_payload(serializer.data)}
+        if cacheable:
+            await acache_feed_page(request, version, page)
+    else:
+        unchanged = not_modified(request, page['etag'])
+        if unchanged is not None:
+            return unchanged
+    
+    return with_validators(json_response(page['data']), page['etag'])
+
+@async_api_view([permissions.IsAuthenticated])
+async def post_detail(request, pk):
+    """Async read-only ``PostDetailView``"""
+    try:
+        post = await Post.objects.select_related('author', 'approved_by').aget(pk=pk)
+    except Post.DoesNotExist:
+        raise exceptions.NotFound()
+    
+    if not post.can_be_viewed_by(request.user):
+        raise exceptions.PermissionDenied("You don't have permission to view this post")
+    
+    etag, last_modified = post_validators(post)
+    unchanged = not_modified(request, etag, last_modified)
+    if unchanged is not None:
+        return unchanged
+    
+    return with_validators(json_response(PostSerializer(post).data), etag, last_modified)
+
+
+def sse_message(event_id, event):
+    return f"id: {event_id}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+async def event_stream(user, expires_at):
+    """SSE frames for ``user`` until the client leaves or its token expires.
+    
+    Event ids count the frames sent on this connection only; there is no
+    shared sequence to resume from, so ``Last-Event-ID`` is ignored and a
+    reconnecting client refetches the posts it shows.
+    """
+    heartbeat = getattr(settings, 'MODERATION_EVENT_HEARTBEAT', 15)
+    sent = 0
+    # Subscribe on first iteration so an unread response never leaks a queue
+    subscription = hub.subscribe(user)
+    try:
+        yield 'retry: 5000\n\n'
+        while True:
+            remaining = expires_at - time.time() if expires_at else heartbeat
+            if remaining <= 0:
+                yield 'event: token_expired\ndata: {}\n\n'
+                return
+            
+            event = await subscription.get(min(heartbeat, remaining))
+            if event is None:
+                yield ': keep-alive\n\n'
+            elif event is OVERFLOW:
+                yield 'event: overflow\ndata: {}\n\n'
+                return
+            else:
+                sent += 1
+                yield sse_message(sent, event)
+    finally:
+        hub.unsubscribe(subscription)
+
+@async_api_view([permissions.IsAuthenticated])
+async def post_events(request):
+    """Server-Sent Events stream of post status changes the user may see.
+    
+    Serve it from an ASGI worker: each open stream is a coroutine, not a
+    thread. The stream ends when the access token expires; clients then
+    reconnect with a fresh token.
+    """
+    response = StreamingHttpResponse(
+        event_stream(request.user, request.auth.get('exp')),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
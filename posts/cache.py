@@ -0,0 +1,71 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from users.metrics import record_cache_lookup
+
+VERSION_KEY = 'feed:version'
+
+def get_feed_cache():
+    """The cache backend holding feed pages (``settings.FEED_CACHE_ALIAS``)"""
+    return caches[getattr(settings, 'FEED_CACHE_ALIAS', 'default')]
+
+def get_feed_version():
+    cache = get_feed_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Seed from the clock so an evicted counter never reuses an old version
+        cache.add(VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+async def aget_feed_version():
+    cache = get_feed_cache()
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = await cache.aget(VERSION_KEY)
+    return version
+
+def bump_feed_version():
+    """Invalidate every cached feed page at once"""
+    cache = get_feed_cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        get_feed_version()
+
+def is_feed_cacheable(request):
+    """Only roles whose feed is identical for every member share cache entries"""
+    role = getattr(request.user, 'role', None)
+    return role in getattr(settings, 'FEED_CACHE_ROLES', ['user'])
+
+def feed_cache_key(request, version):
+    """Cache key for a feed page: role, feed version and the page's URL"""
+    query = request.GET.urlencode()
+    # The path is part of the key because next links point back at it
+    digest = hashlib.sha256(f'{request.get_host()}{request.path}?{query}'.encode()).hexdigest()
+    return f'feed:{request.user.role}:{version}:{digest}'
+
+# Callers read the feed version once, before querying, and pass it to both
+# the lookup and the store: a page queried before an approval commits must
+# not be stored under the version that approval bumped to
+
+def get_cached_feed_page(request, version):
+    page = get_feed_cache().get(feed_cache_key(request, version))
+    record_cache_lookup('feed', page is not None)
+    return page
+
+def cache_feed_page(request, version, data):
+    timeout = getattr(settings, 'FEED_CACHE_TIMEOUT', 300)
+    get_feed_cache().set(feed_cache_key(request, version), data, timeout=timeout)
+
+async def aget_cached_feed_page(request, version):
+    page = await get_feed_cache().aget(feed_cache_key(request, version))
+    record_cache_lookup('feed', page is not None)
+    return page
+
+async def acache_feed_page(request, version, data):
+    timeout = getattr(settings, 'FEED_CACHE_TIMEOUT', 300)
+    await get_feed_cache().aset(feed_cache_key(request, version), data, timeout=timeout)
@@ -0,0 +1,141 @@
+import abc
+import asyncio
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+OVERFLOW = object()
+
+# Roles that may see who moderated a post
+STAFF_ROLES = ('admin', 'editor')
+
+def can_receive(user, event):
+    """Mirror ``Post.can_be_viewed_by`` for a status-change event"""
+    if user.role == 'admin':
+        return True
+    if user.role == 'editor' and event['author_id'] == user.pk:
+        return True
+    return event['status'] == 'approved'
+
+def public_event(event):
+    """``event`` without the fields reserved for ``STAFF_ROLES``"""
+    return {key: value for key, value in event.items() if key != 'moderator_id'}
+
+class Subscription:
+    """One SSE client: a bounded queue owned by the client's event loop"""
+    
+    def __init__(self, user, maxsize):
+        self.user = user
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+    
+    def offer(self, event):
+        # Runs on self.loop. A client that cannot keep up is cut off rather
+        # than buffering without bound; it reconnects and refetches state.
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(OVERFLOW)
+    
+    async def get(self, timeout):
+        """Next event, ``OVERFLOW``, or None after ``timeout`` seconds idle"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+class EventHub:
+    """In-process fan-out of moderation events to this worker's subscribers.
+    
+    ``dispatch`` may be called from any thread; each event is handed to the
+    subscriber's own loop with ``call_soon_threadsafe``.
+    """
+    
+    def __init__(self):
+        self.subscriptions = set()
+        self.lock = threading.Lock()
+    
+    def subscribe(self, user, maxsize=None):
+        maxsize = maxsize or getattr(settings, 'MODERATION_EVENT_QUEUE_SIZE', 100)
+        subscription = Subscription(user, maxsize)
+        with self.lock:
+            self.subscriptions.add(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscriptions.discard(subscription)
+    
+    def dispatch(self, event):
+        with self.lock:
+            subscriptions = list(self.subscriptions)
+        
+        public = public_event(event)
+        for subscription in subscriptions:
+            user = subscription.user
+            if not can_receive(user, event):
+                continue
+            payload = event if user.role in STAFF_ROLES else public
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, payload)
+            except RuntimeError:
+                # The client's loop has shut down
+                self.unsubscribe(subscription)
+
+class BaseBroker(abc.ABC):
+    """Carries events to every worker's hub.
+    
+    A multi-worker deployment subclasses this, e.g. publishing to Redis
+    pub/sub and calling ``self.hub.dispatch`` from a listener thread, and
+    points ``settings.MODERATION_EVENT_BROKER`` at it.
+    """
+    
+    def __init__(self, hub):
+        self.hub = hub
+    
+    @abc.abstractmethod
+    def publish(self, event):
+        """Deliver ``event`` to the hub of every worker"""
+
+class LocalBroker(BaseBroker):
+    """Single-process stand-in: events go straight to this worker's hub"""
+    
+    def publish(self, event):
+        self.hub.dispatch(event)
+
+hub = EventHub()
+_broker = None
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        broker_class = import_string(getattr(settings, 'MODERATION_EVENT_BROKER', 'posts.events.LocalBroker'))
+        _broker = broker_class(hub)
+    return _broker
+
+def status_event(post_id, author_id, status, previous_status, moderator_id, rejection_reason='', at=None):
+    return {
+        'type': 'post.status',
+        'post_id': post_id,
+        'author_id': author_id,
+        'status': status,
+        'previous_status': previous_status,
+        'moderator_id': moderator_id,
+        'rejection_reason': rejection_reason,
+        'at': (at or timezone.now()).isoformat(),
+    }
+
+def publish_events(events):
+    """Publish once the surrounding transaction commits, never for a rollback"""
+    events = list(events)
+    if events:
+        transaction.on_commit(lambda: [get_broker().publish(event) for event in events])
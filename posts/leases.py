@@ -0,0 +1,49 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import Post
+
+def available_for_claim(now):
+    """Pending posts with no lease, or whose lease has expired"""
+    return Post.objects.filter(status='pending').filter(
+        Q(claim_expires_at__isnull=True) | Q(claim_expires_at__lte=now)
+    )
+
+def claim_pending_posts(moderator, count, lease_seconds=None):
+    """Lease the ``count`` oldest unclaimed pending posts to ``moderator``.
+    
+    On backends with ``SKIP LOCKED`` (Postgres, MySQL 8) concurrent claimers
+    skip each other's rows instead of queueing on them. SQLite serializes
+    writers, so a single ``UPDATE ... WHERE id IN (SELECT ... LIMIT n)`` is
+    already atomic there. Expired leases are simply claimable again.
+    """
+    lease_seconds = lease_seconds or getattr(settings, 'POST_CLAIM_LEASE_SECONDS', 300)
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=lease_seconds)
+    candidates = available_for_claim(now).order_by('created_at', 'id')
+    
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            ids = list(
+                candidates.select_for_update(skip_locked=True).values_list('id', flat=True)[:count]
+            )
+            target = Post.objects.filter(id__in=ids)
+        else:
+            target = available_for_claim(now).filter(
+                id__in=candidates.values('id')[:count]
+            )
+        target.update(claimed_by_id=moderator.pk, claim_expires_at=expires_at)
+    
+    return Post.objects.select_related('author').filter(
+        claimed_by_id=moderator.pk, claim_expires_at=expires_at
+    ).order_by('created_at', 'id')
+
+def release_claims(moderator, post_ids=None):
+    """Give back ``moderator``'s leases (all of them, or only ``post_ids``)"""
+    queryset = Post.objects.filter(claimed_by_id=moderator.pk)
+    if post_ids is not None:
+        queryset = queryset.filter(id__in=post_ids)
+    return queryset.update(claimed_by=None, claim_expires_at=None)
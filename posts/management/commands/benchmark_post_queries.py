@@ -0,0 +1,149 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from posts.models import Post
+from posts.seeding import seed_posts
+from users.pagination import PostCursorPagination
+
+User = get_user_model()
+
+class Command(BaseCommand):
+    """Management command to compare post list query plans with and without indexes"""
+    help = 'Seeds posts and reports query plans and latencies for each list endpoint'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--posts',
+            type=int,
+            default=5_000_000,
+            help='Total number of posts to have in the table before measuring',
+        )
+        parser.add_argument(
+            '--editors',
+            type=int,
+            default=50,
+            help='Number of editor accounts the seeded posts are spread over',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Timed runs per query (the median is reported)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=20000,
+            help='Rows inserted per bulk_create batch while seeding',
+        )
+        parser.add_argument(
+            '--deep-offset',
+            type=int,
+            default=10000,
+            help='Row whose cursor starts the deep page measured for each endpoint',
+        )
+        parser.add_argument(
+            '--i-know',
+            action='store_true',
+            help='Confirm that the configured database may have its post indexes dropped',
+        )
+    
+    def handle(self, *args, **options):
+        if not options['i_know']:
+            # The "before" run drops the indexes on the configured database itself
+            raise CommandError(
+                f"This drops and recreates the post indexes on {connection.settings_dict['NAME']}; "
+                'point DATABASES at a throwaway database and pass --i-know'
+            )
+        
+        editors = self.ensure_editors(options['editors'])
+        
+        missing = options['posts'] - Post.objects.count()
+        if missing > 0:
+            seed_posts(
+                missing,
+                [editor.pk for editor in editors],
+                batch_size=options['batch_size'],
+                progress=lambda done, total: self.stdout.write(f'Seeded {done}/{total} posts...'),
+            )
+            call_command('rebuild_post_counters', stdout=self.stdout)
+        
+        queries = self.keyset_pages(self.endpoint_queries(editors[0]), options['deep_offset'])
+        
+        with connection.schema_editor() as editor:
+            for index in Post._meta.indexes:
+                editor.remove_index(Post, index)
+        try:
+            before = self.measure(queries, options['repeat'], 'without indexes')
+        finally:
+            with connection.schema_editor() as editor:
+                for index in Post._meta.indexes:
+                    editor.add_index(Post, index)
+        
+        with connection.cursor() as cursor:
+            if connection.vendor in ('sqlite', 'postgresql'):
+                cursor.execute('ANALYZE')
+        after = self.measure(queries, options['repeat'], 'with indexes')
+        
+        self.stdout.write(self.style.SUCCESS('\nMedian latency (ms): before -> after'))
+        for name in queries:
+            self.stdout.write(f'{name:>33}: {before[name]:9.2f} -> {after[name]:9.2f}')
+    
+    def ensure_editors(self, count):
+        editors = list(User.objects.filter(email__startswith='bench-editor-'))
+        for i in range(len(editors), count):
+            editors.append(User.objects.create_user(
+                email=f'bench-editor-{i}@example.com',
+                full_name='Benchmark Editor',
+                role='editor'
+            ))
+        return editors
+    
+    def endpoint_queries(self, editor):
+        """The querysets the list endpoints paginate, by endpoint"""
+        return {
+            'post_list (admin)': Post.objects.all(),
+            'post_list (editor)': Post.objects.filter(
+                models.Q(author_id=editor.pk) | models.Q(status='approved')
+            ),
+            'post_list (user)': Post.objects.filter(status='approved'),
+            'pending_posts': Post.objects.filter(status='pending'),
+            'editor_dashboard recent': Post.objects.filter(author_id=editor.pk),
+        }
+    
+    def keyset_pages(self, queries, deep_offset):
+        """First and deep page queries, ordered and seeked as the list endpoints do"""
+        paginator = PostCursorPagination()
+        pages = {}
+        for name, queryset in queries.items():
+            pages[name] = self.seek(paginator, queryset, None)
+            
+            ordered = queryset.order_by(*paginator.get_ordering()).only('id', paginator.ordering_field)
+            start = list(ordered[deep_offset:deep_offset + 1])
+            if start:
+                pages[f'{name} deep'] = self.seek(paginator, queryset, paginator.encode_cursor(start[0]))
+        return pages
+    
+    def seek(self, paginator, queryset, cursor):
+        params = {paginator.cursor_query_param: cursor} if cursor else {}
+        paginator.start_page(Request(APIRequestFactory().get('/', params)))
+        return paginator.seek(queryset)
+    
+    def measure(self, queries, repeat, label):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\nQuery plans {label}'))
+        results = {}
+        for name, page in queries.items():
+            self.stdout.write(f'\n{name}:\n{page.explain()}')
+            
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(page.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            results[name] = sorted(timings)[len(timings) // 2]
+        return results
@@ -0,0 +1,42 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from posts.models import PostTombstone
+
+class Command(BaseCommand):
+    """Management command to prune delta sync tombstones past their retention"""
+    help = 'Deletes post tombstones older than POST_TOMBSTONE_RETENTION_DAYS in batches'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Number of tombstones deleted per batch',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many rows would be deleted',
+        )
+    
+    def handle(self, *args, **options):
+        days = getattr(settings, 'POST_TOMBSTONE_RETENTION_DAYS', 30)
+        expired = PostTombstone.objects.filter(removed_at__lt=timezone.now() - timedelta(days=days))
+        
+        if options['dry_run']:
+            self.stdout.write(f'{expired.count()} tombstones would be deleted')
+            return
+        
+        total = 0
+        while True:
+            ids = list(expired.order_by('removed_at', 'id').values_list('pk', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            PostTombstone.objects.filter(pk__in=ids).delete()
+            total += len(ids)
+            self.stdout.write(f'Deleted {total} tombstones...')
+        
+        self.stdout.write(self.style.SUCCESS(f'Pruned {total} tombstones older than {days} days'))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from posts.models import AuthorPostStats
+
+class Command(BaseCommand):
+    """Management command to reconcile per-author post counters"""
+    help = 'Rebuilds AuthorPostStats from the posts table in bulk'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Number of counter rows inserted per batch',
+        )
+    
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        total = 0
+        
+        with transaction.atomic():
+            AuthorPostStats.objects.all().delete()
+            
+            batch = []
+            for row in AuthorPostStats.count_for().iterator(chunk_size=batch_size):
+                batch.append(AuthorPostStats(**row))
+                if len(batch) >= batch_size:
+                    AuthorPostStats.objects.bulk_create(batch)
+                    total += len(batch)
+                    batch = []
+            
+            AuthorPostStats.objects.bulk_create(batch)
+            total += len(batch)
+        
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt post counters for {total} authors'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from posts.search import rebuild_search_index
+
+class Command(BaseCommand):
+    """Management command to rebuild the post full-text search index"""
+    help = 'Rebuilds the FTS5 table (SQLite) or the GIN index (Postgres) for post search'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Number of posts indexed per batch (SQLite)',
+        )
+    
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            total = rebuild_search_index(
+                batch_size=options['batch_size'],
+                progress=lambda done: self.stdout.write(f'Indexed {done} posts...'),
+            )
+        self.stdout.write(self.style.SUCCESS(f'Search index rebuilt for {total} posts'))
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-17 00:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0001_initial'),
+        ('users', '0002_user_token_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorPostStats',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='post_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('draft_posts', models.IntegerField(default=0)),
+                ('pending_posts', models.IntegerField(default=0)),
+                ('approved_posts', models.IntegerField(default=0)),
+                ('rejected_posts', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'author_post_stats',
+            },
+        ),
+    ]
@@ -0,0 +1,72 @@
+from django.db import migrations
+
+# Schema as of this migration; posts.search must not be imported here since
+# it imports the current models
+SQLITE_SCHEMA = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS posts_search
+        USING fts5(title, content, author_name, tokenize='porter unicode61')""",
+    """CREATE TRIGGER IF NOT EXISTS posts_search_insert AFTER INSERT ON posts BEGIN
+        INSERT INTO posts_search(rowid, title, content, author_name)
+        VALUES (new.id, new.title, new.content,
+                (SELECT full_name FROM users WHERE id = new.author_id));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_search_update
+        AFTER UPDATE OF title, content, author_id ON posts BEGIN
+        DELETE FROM posts_search WHERE rowid = old.id;
+        INSERT INTO posts_search(rowid, title, content, author_name)
+        VALUES (new.id, new.title, new.content,
+                (SELECT full_name FROM users WHERE id = new.author_id));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_search_delete AFTER DELETE ON posts BEGIN
+        DELETE FROM posts_search WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_search_author AFTER UPDATE OF full_name ON users BEGIN
+        UPDATE posts_search SET author_name = new.full_name
+        WHERE rowid IN (SELECT id FROM posts WHERE author_id = new.id);
+    END""",
+    # Index posts that existed before the triggers
+    """INSERT INTO posts_search(rowid, title, content, author_name)
+        SELECT p.id, p.title, p.content, u.full_name
+        FROM posts p JOIN users u ON u.id = p.author_id""",
+]
+
+SQLITE_DROP = [
+    'DROP TRIGGER IF EXISTS posts_search_author',
+    'DROP TRIGGER IF EXISTS posts_search_delete',
+    'DROP TRIGGER IF EXISTS posts_search_update',
+    'DROP TRIGGER IF EXISTS posts_search_insert',
+    'DROP TABLE IF EXISTS posts_search',
+]
+
+POSTGRES_SCHEMA = [
+    """CREATE INDEX IF NOT EXISTS posts_search_gin ON posts USING GIN
+        (to_tsvector('english', coalesce(title, '') || ' ' || coalesce(content, '')))""",
+]
+
+POSTGRES_DROP = [
+    'DROP INDEX IF EXISTS posts_search_gin',
+]
+
+
+def create_index(apps, schema_editor):
+    statements = {'sqlite': SQLITE_SCHEMA, 'postgresql': POSTGRES_SCHEMA}.get(schema_editor.connection.vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def drop_index(apps, schema_editor):
+    statements = {'sqlite': SQLITE_DROP, 'postgresql': POSTGRES_DROP}.get(schema_editor.connection.vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0003_post_access_indexes'),
+        ('users', '0003_user_date_joined_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
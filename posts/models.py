@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 
@@ -29,10 +29,65 @@ class Post(models.Model):
     )
     approved_at = models.DateTimeField(null=True, blank=True)
     rejection_reason = models.TextField(blank=True)
+    # Moderation lease (see posts.leases); free again once claim_expires_at passes
+    claimed_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='claimed_posts'
+    )
+    claim_expires_at = models.DateTimeField(null=True, blank=True)
     
     class Meta:
         ordering = ['-created_at']
         db_table = 'posts'
+        indexes = [
+            # Admin listing: ORDER BY created_at DESC without a filter
+            models.Index(fields=['-created_at'], name='posts_created_idx'),
+            # Role-filtered listings: WHERE status = ... ORDER BY created_at DESC
+            models.Index(fields=['status', '-created_at'], name='posts_status_created_idx'),
+            # Per-author views and dashboards
+            models.Index(fields=['author', 'status', '-created_at'], name='posts_author_status_idx'),
+            # Moderation queue; stays small however many posts are approved
+            models.Index(
+                fields=['-created_at'],
+                name='posts_pending_created_idx',
+                condition=models.Q(status='pending')
+            ),
+            # Delta sync: WHERE (updated_at, id) > watermark ORDER BY updated_at, id
+            models.Index(fields=['updated_at', 'id'], name='posts_updated_idx'),
+        ]
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so signals can see transitions
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+    
+    def stored_status(self):
+        """The status in the database, read with the row locked until commit"""
+        return Post.objects.select_for_update().filter(pk=self.pk).values_list('status', flat=True).first()
+    
+    def save(self, *args, **kwargs):
+        # Keep the post and its author's counters (see signals) in one transaction
+        with transaction.atomic():
+            update_fields = kwargs.get('update_fields')
+            if not self._state.adding and (update_fields is None or 'status' in update_fields):
+                # Counter deltas come from the locked row, not from a status
+                # loaded earlier that a concurrent save may have changed since
+                self._loaded_status = self.stored_status()
+            super().save(*args, **kwargs)
+        self._loaded_status = self.status
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            self._loaded_status = self.stored_status()
+            if self._loaded_status is None:
+                # Deleted concurrently; post_delete would count it twice
+                return 0, {}
+            return super().delete(*args, **kwargs)
     
     def __str__(self):
         return f"{self.title} - {self.status} by {self.author.full_name}"
@@ -45,7 +100,106 @@ class Post(models.Model):
         
         # Editors can see their own posts and approved posts
         if user.role == 'editor':
-            return self.author == user or self.status == 'approved'
+            return self.author_id == user.pk or self.status == 'approved'
         
         # Users can only see approved posts
         return self.status == 'approved'
+    
+    def is_claimed_by_other(self, user, now=None):
+        """Check if another moderator holds an unexpired lease on this post"""
+        if self.claimed_by_id is None or self.claimed_by_id == user.pk:
+            return False
+        return self.claim_expires_at is not None and self.claim_expires_at > (now or timezone.now())
+
+
+class AuthorPostStats(models.Model):
+    """Denormalized per-author post totals by status, kept in sync by signals"""
+    
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='post_stats'
+    )
+    draft_posts = models.IntegerField(default=0)
+    pending_posts = models.IntegerField(default=0)
+    approved_posts = models.IntegerField(default=0)
+    rejected_posts = models.IntegerField(default=0)
+    
+    class Meta:
+        db_table = 'author_post_stats'
+    
+    def __str__(self):
+        return f"Post stats for author {self.author_id}"
+    
+    @property
+    def total_posts(self):
+        return self.draft_posts + self.pending_posts + self.approved_posts + self.rejected_posts
+    
+    @staticmethod
+    def field_for(status):
+        return f'{status}_posts'
+    
+    @classmethod
+    def count_for(cls, author_ids=None):
+        """Per-author totals computed from the posts table"""
+        queryset = Post.objects.order_by()
+        if author_ids is not None:
+            queryset = queryset.filter(author_id__in=author_ids)
+        return queryset.values('author_id').annotate(**{
+            cls.field_for(status): models.Count('pk', filter=models.Q(status=status))
+            for status, _ in Post.STATUS_CHOICES
+        })
+    
+    @classmethod
+    def rebuild_for(cls, author_id):
+        """Recompute one author's counters from the posts table"""
+        with transaction.atomic():
+            # Concurrent first posts: the second insert waits for the first
+            # to commit, then both count under the row lock
+            cls.objects.bulk_create([cls(author_id=author_id)], ignore_conflicts=True)
+            stats = cls.objects.select_for_update().get(author_id=author_id)
+            for status, _ in Post.STATUS_CHOICES:
+                setattr(stats, cls.field_for(status), 0)
+            for row in cls.count_for([author_id]):
+                row.pop('author_id')
+                for field, value in row.items():
+                    setattr(stats, field, value)
+            stats.save()
+        return stats
+    
+    @classmethod
+    def adjust(cls, author_id, rebuild_missing=True, **deltas):
+        """Apply status deltas, e.g. ``adjust(1, pending=-1, approved=1)``"""
+        updated = cls.objects.filter(author_id=author_id).update(**{
+            cls.field_for(status): models.F(cls.field_for(status)) + delta
+            for status, delta in deltas.items()
+        })
+        if not updated and rebuild_missing:
+            # First post for this author (or counters never built)
+            cls.rebuild_for(author_id)
+
+
+class PostTombstone(models.Model):
+    """Record of a post leaving someone's view, for delta sync clients"""
+    
+    REASON_CHOICES = [
+        ('deleted', 'Deleted'),
+        ('unapproved', 'No longer approved'),
+    ]
+    
+    # Plain integers: the post (and maybe its author) no longer exist
+    post_id = models.BigIntegerField()
+    author_id = models.BigIntegerField()
+    previous_status = models.CharField(max_length=20, choices=Post.STATUS_CHOICES)
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES)
+    removed_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        db_table = 'post_tombstones'
+        indexes = [
+            models.Index(fields=['removed_at', 'id'], name='post_tombstones_removed_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Post {self.post_id} {self.reason} at {self.removed_at}"
@@ -0,0 +1,90 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from users.dashboard import invalidate_admin_dashboard
+from .cache import bump_feed_version
+from .events import publish_events, status_event
+from .models import AuthorPostStats, Post
+from .signals import posts_moderated
+
+ACTION_STATUS = {
+    'approve': 'approved',
+    'reject': 'rejected',
+}
+
+def moderate_posts(post_ids, action, moderator, rejection_reason=''):
+    """Approve or reject many pending posts with a single UPDATE.
+    
+    Matching rows are locked first (``SELECT ... FOR UPDATE`` where the
+    backend supports it) so the counters adjusted afterwards agree with what
+    the UPDATE changed. Returns the updated ids, ids that exist but were no
+    longer pending, ids leased to another moderator, and ids that do not exist.
+    """
+    post_ids = sorted(set(post_ids))
+    new_status = ACTION_STATUS[action]
+    # Posts under another moderator's unexpired lease are left alone
+    lease_free = (
+        Q(claimed_by__isnull=True) | Q(claimed_by_id=moderator.pk) | Q(claim_expires_at__lte=timezone.now())
+    )
+    
+    with transaction.atomic():
+        matched = list(
+            Post.objects.select_for_update()
+            .filter(lease_free, id__in=post_ids, status='pending')
+            .order_by('id')  # consistent lock order across concurrent requests
+            .values_list('id', 'author_id')
+        )
+        updated_ids = [post_id for post_id, _ in matched]
+        # Stamp after the locks are held: waiting for them must not leave
+        # updated_at behind a delta-sync watermark handed out meanwhile
+        now = timezone.now()
+        
+        if updated_ids:
+            Post.objects.filter(id__in=updated_ids, status='pending').update(
+                status=new_status,
+                approved_by_id=moderator.pk,
+                approved_at=now,
+                rejection_reason=rejection_reason if action == 'reject' else '',
+                updated_at=now,
+                claimed_by=None,
+                claim_expires_at=None,
+            )
+            for author_id, count in Counter(author_id for _, author_id in matched).items():
+                AuthorPostStats.adjust(author_id, **{'pending': -count, new_status: count})
+            
+            reason = rejection_reason if action == 'reject' else ''
+            publish_events(
+                status_event(post_id, author_id, new_status, 'pending', moderator.pk, reason, now)
+                for post_id, author_id in matched
+            )
+        
+        remaining = set(post_ids) - set(updated_ids)
+        skipped = dict(
+            Post.objects.filter(id__in=remaining).values_list('id', 'status')
+        ) if remaining else {}
+    
+    claimed = sorted(post_id for post_id, status in skipped.items() if status == 'pending')
+    not_pending = sorted(post_id for post_id, status in skipped.items() if status != 'pending')
+    
+    if updated_ids:
+        invalidate_admin_dashboard()
+        if new_status == 'approved':
+            bump_feed_version()
+    
+    posts_moderated.send(
+        sender=Post,
+        action=action,
+        post_ids=updated_ids,
+        moderator=moderator,
+        skipped_ids=sorted(remaining),
+    )
+    
+    return {
+        'action': action,
+        'updated': updated_ids,
+        'not_pending': not_pending,
+        'claimed_by_other': claimed,
+        'not_found': sorted(remaining - set(skipped)),
+    }
@@ -0,0 +1,142 @@
+import html
+import re
+
+from django.db import connection
+from django.db.models import Q
+from .models import Post
+
+SQLITE_TABLE = 'posts_search'
+POSTGRES_INDEX = 'posts_search_gin'
+
+def postgres_document(alias=''):
+    """The tsvector expression; queries must repeat it exactly to use the index"""
+    prefix = f'{alias}.' if alias else ''
+    return f"to_tsvector('english', coalesce({prefix}title, '') || ' ' || coalesce({prefix}content, ''))"
+
+# The FTS5 table, its triggers and the GIN index are created by migration
+# 0004_post_search_index
+
+def rebuild_search_index(batch_size=10000, progress=None, using=None):
+    """Repopulate the search index from the posts table, one id range at a time"""
+    using = using or connection
+    if using.vendor == 'postgresql':
+        with using.cursor() as cursor:
+            cursor.execute(f'REINDEX INDEX {POSTGRES_INDEX}')
+            cursor.execute('SELECT COUNT(*) FROM posts')
+            return cursor.fetchone()[0]
+    
+    if using.vendor != 'sqlite':
+        return 0
+    
+    with using.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SQLITE_TABLE}')
+        last_id = 0
+        total = 0
+        while True:
+            cursor.execute('SELECT MAX(id) FROM (SELECT id FROM posts WHERE id > %s ORDER BY id LIMIT %s)',
+                           [last_id, batch_size])
+            upper = cursor.fetchone()[0]
+            if upper is None:
+                break
+            cursor.execute(
+                f"""INSERT INTO {SQLITE_TABLE}(rowid, title, content, author_name)
+                    SELECT p.id, p.title, p.content, u.full_name
+                    FROM posts p JOIN users u ON u.id = p.author_id
+                    WHERE p.id > %s AND p.id <= %s""",
+                [last_id, upper]
+            )
+            total += cursor.rowcount
+            last_id = upper
+            if progress:
+                progress(total)
+    return total
+
+def build_match_query(text):
+    """Turn free text into a safe FTS5 query: all terms, last one as a prefix"""
+    terms = re.findall(r'\w+', text)
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+# Private-use code points mark matches in the raw snippet; they are swapped
+# for <mark> tags only after the post text itself has been HTML-escaped
+MATCH_START = '\ue000'
+MATCH_STOP = '\ue001'
+
+def highlight(snippet):
+    """HTML-safe snippet with matches wrapped in ``<mark>``"""
+    escaped = html.escape(snippet or '')
+    return escaped.replace(MATCH_START, '<mark>').replace(MATCH_STOP, '</mark>')
+
+def visibility_sql(user):
+    """SQL twin of Post.can_be_viewed_by for alias ``p``"""
+    if user.role == 'admin':
+        return '1 = 1', []
+    if user.role == 'editor':
+        return "(p.status = 'approved' OR p.author_id = %s)", [user.pk]
+    return "p.status = 'approved'", []
+
+def search_posts(text, user, limit=20):
+    """Ranked posts matching ``text`` that ``user`` is allowed to see.
+    
+    Results are ``Post`` instances (id, title, status, created_at and
+    author_id loaded) annotated with ``author_name``, ``snippet`` and
+    ``rank`` (higher is better). Snippets are HTML-escaped post text with
+    the matched terms in ``<mark>`` tags.
+    """
+    where, params = visibility_sql(user)
+    results = _search(text, user, where, params, limit)
+    for post in results:
+        post.snippet = highlight(post.snippet)
+    return results
+
+def _search(text, user, where, params, limit):    
+    if connection.vendor == 'sqlite':
+        match = build_match_query(text)
+        if match is None:
+            return []
+        sql = f"""
+            SELECT p.id, p.title, p.status, p.created_at, p.author_id,
+                   s.author_name AS author_name,
+                   snippet({SQLITE_TABLE}, 1, %s, %s, '…', 16) AS snippet,
+                   -bm25({SQLITE_TABLE}, 10.0, 1.0, 2.0) AS rank
+            FROM {SQLITE_TABLE} s JOIN posts p ON p.id = s.rowid
+            WHERE {SQLITE_TABLE} MATCH %s AND {where}
+            ORDER BY bm25({SQLITE_TABLE}, 10.0, 1.0, 2.0)
+            LIMIT %s
+        """
+        return list(Post.objects.raw(sql, [MATCH_START, MATCH_STOP, match] + params + [limit]))
+    
+    if connection.vendor == 'postgresql':
+        sql = f"""
+            SELECT p.id, p.title, p.status, p.created_at, p.author_id,
+                   u.full_name AS author_name,
+                   ts_headline('english', p.content, q.query, %s) AS snippet,
+                   ts_rank({postgres_document('p')}, q.query) AS rank
+            FROM posts p
+            JOIN users u ON u.id = p.author_id,
+                 websearch_to_tsquery('english', %s) AS q(query)
+            WHERE {postgres_document('p')} @@ q.query
+              AND {where}
+            ORDER BY rank DESC
+            LIMIT %s
+        """
+        options = f'StartSel={MATCH_START}, StopSel={MATCH_STOP}, MaxWords=30'
+        return list(Post.objects.raw(sql, [options, text] + params + [limit]))
+    
+    # No full-text support on this backend: fall back to a scan
+    queryset = Post.objects.select_related('author').filter(
+        Q(title__icontains=text) | Q(content__icontains=text)
+    )
+    if user.role == 'editor':
+        queryset = queryset.filter(Q(status='approved') | Q(author_id=user.pk))
+    elif user.role != 'admin':
+        queryset = queryset.filter(status='approved')
+    results = list(queryset[:limit])
+    for post in results:
+        post.author_name = post.author.full_name
+        post.snippet = post.title
+        post.rank = 0.0
+    return results
@@ -0,0 +1,55 @@
+import random
+from datetime import timedelta
+from itertools import accumulate
+
+from django.db import transaction
+from django.utils import timezone
+from .models import Post
+
+STATUS_WEIGHTS = {
+    'approved': 70,
+    'pending': 10,
+    'rejected': 8,
+    'draft': 12,
+}
+
+def seed_posts(count, author_ids, batch_size=10000, seed=0, days=365,
+               status_weights=None, author_weights=None, progress=None):
+    """Bulk insert ``count`` posts spread over ``author_ids``.
+    
+    Posts get weighted random statuses and ``created_at`` values spread over
+    the last ``days`` days. ``author_weights`` (parallel to ``author_ids``)
+    skews how many posts each author gets. Signals do not fire for bulk
+    inserts, so callers should rebuild ``AuthorPostStats`` afterwards.
+    """
+    rng = random.Random(seed)
+    table = status_weights or STATUS_WEIGHTS
+    statuses = list(table)
+    weights = list(table.values())
+    author_cum_weights = list(accumulate(author_weights)) if author_weights else None
+    now = timezone.now()
+    window = days * 24 * 3600
+    
+    created = 0
+    while created < count:
+        size = min(batch_size, count - created)
+        posts = []
+        for status in rng.choices(statuses, weights=weights, k=size):
+            created_at = now - timedelta(seconds=rng.randrange(window))
+            posts.append(Post(
+                title=f'Seeded post {created + len(posts)}',
+                content='Lorem ipsum dolor sit amet. ' * rng.randint(5, 40),
+                author_id=(rng.choices(author_ids, cum_weights=author_cum_weights)[0]
+                           if author_cum_weights else rng.choice(author_ids)),
+                status=status,
+                created_at=created_at,
+                approved_at=created_at if status in ('approved', 'rejected') else None,
+            ))
+        
+        with transaction.atomic():
+            Post.objects.bulk_create(posts, batch_size=batch_size)
+        created += size
+        if progress:
+            progress(created, count)
+    
+    return created
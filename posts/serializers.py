@@ -1,7 +1,12 @@
 from rest_framework import serializers
+from django.conf import settings
+from django.db.models.functions import Substr
+from django.utils import timezone
+from users.serializers import SparseFieldsetMixin, TimedListSerializer, TimedRepresentationMixin
+from .events import publish_events, status_event
 from .models import Post
 
-class PostSerializer(serializers.ModelSerializer):
+class PostSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     """Serializer for post creation and editing"""
     author_name = serializers.CharField(source='author.full_name', read_only=True)
     approved_by_name = serializers.CharField(source='approved_by.full_name', read_only=True)
@@ -14,13 +19,14 @@ class PostSerializer(serializers.ModelSerializer):
             'approved_at', 'rejection_reason'
         ]
         read_only_fields = ['author', 'approved_by', 'approved_at']
+        list_serializer_class = TimedListSerializer
     
     def create(self, validated_data):
-        # Set author to current user
-        validated_data['author'] = self.context['request'].user
+        # Set author to current user (by id, so claim-backed users work too)
+        user = self.context['request'].user
+        validated_data['author_id'] = user.pk
         
         # Set initial status based on user role
-        user = self.context['request'].user
         if user.role == 'editor':
             validated_data['status'] = 'pending'
         else:
@@ -28,17 +34,78 @@ class PostSerializer(serializers.ModelSerializer):
         
         return super().create(validated_data)
 
-class PostListSerializer(serializers.ModelSerializer):
-    """Serializer for post listing"""
+class PostListSerializer(TimedRepresentationMixin, SparseFieldsetMixin, serializers.ModelSerializer):
+    """Serializer for post listing (excerpt instead of full content, supports ?fields=)"""
     author_name = serializers.CharField(source='author.full_name', read_only=True)
     approved_by_name = serializers.CharField(source='approved_by.full_name', read_only=True)
+    excerpt = serializers.SerializerMethodField()
+    
+    # Columns each output field needs; 'id' and 'created_at' are always
+    # loaded for cursor pagination and 'updated_at' for list ETags
+    field_columns = {
+        'id': [],
+        'title': ['title'],
+        'excerpt': [],
+        'author_name': ['author__full_name'],
+        'status': ['status'],
+        'created_at': [],
+        'approved_by_name': ['approved_by__full_name'],
+        'approved_at': ['approved_at'],
+    }
     
     class Meta:
         model = Post
         fields = [
-            'id', 'title', 'content', 'author_name', 'status', 
+            'id', 'title', 'excerpt', 'author_name', 'status', 
             'created_at', 'approved_by_name', 'approved_at'
         ]
+        list_serializer_class = TimedListSerializer
+    
+    @classmethod
+    def excerpt_length(cls):
+        return getattr(settings, 'POST_EXCERPT_LENGTH', 200)
+    
+    @classmethod
+    def optimize_queryset(cls, queryset, request):
+        """Load only the columns and relations the requested fields render"""
+        requested = cls.get_requested_fields(request) or set(cls.Meta.fields)
+        
+        columns = {'id', 'created_at', 'updated_at'}
+        for name in requested & set(cls.field_columns):
+            columns.update(cls.field_columns[name])
+        
+        related = [name for name in ('author', 'approved_by') if any(
+            column.startswith(f'{name}__') for column in columns
+        )]
+        queryset = queryset.select_related(*related).only(*columns)
+        
+        if 'excerpt' in requested:
+            # Cut in the database so full bodies never leave it
+            queryset = queryset.annotate(
+                excerpt_text=Substr('content', 1, cls.excerpt_length() + 1)
+            )
+        return queryset
+    
+    def get_excerpt(self, obj):
+        text = getattr(obj, 'excerpt_text', None)
+        if text is None:
+            text = obj.content
+        
+        limit = self.excerpt_length()
+        if len(text) <= limit:
+            return text
+        return text[:limit].rstrip() + '…'
+
+class PostSearchResultSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
+    """Serializer for ranked full-text search hits"""
+    author_name = serializers.CharField(read_only=True)
+    snippet = serializers.CharField(read_only=True)
+    rank = serializers.FloatField(read_only=True)
+    
+    class Meta:
+        model = Post
+        fields = ['id', 'title', 'snippet', 'author_name', 'status', 'created_at', 'rank']
+        list_serializer_class = TimedListSerializer
 
 class PostApprovalSerializer(serializers.ModelSerializer):
     """Serializer for post approval/rejection"""
@@ -55,14 +122,55 @@ class PostApprovalSerializer(serializers.ModelSerializer):
         
         if action == 'approve':
             instance.status = 'approved'
-            instance.approved_by = user
+            instance.approved_by_id = user.pk
             instance.approved_at = timezone.now()
             instance.rejection_reason = ''
         elif action == 'reject':
             instance.status = 'rejected'
-            instance.approved_by = user
+            instance.approved_by_id = user.pk
             instance.approved_at = timezone.now()
             instance.rejection_reason = validated_data.get('rejection_reason', '')
         
+        previous_status = getattr(instance, '_loaded_status', None)
+        instance.claimed_by = None
+        instance.claim_expires_at = None
         instance.save()
-        return instance
\ No newline at end of file
+        
+        publish_events([status_event(
+            instance.pk, instance.author_id, instance.status, previous_status,
+            user.pk, instance.rejection_reason, instance.approved_at
+        )])
+        return instance
+
+class BulkModerationSerializer(serializers.Serializer):
+    """Validates a bulk approve/reject request"""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=getattr(settings, 'POST_BULK_MODERATION_MAX', 5000)
+    )
+    action = serializers.ChoiceField(choices=['approve', 'reject'])
+    rejection_reason = serializers.CharField(required=False, allow_blank=True, default='')
+
+
+class ClaimedPostSerializer(PostSerializer):
+    """Post data plus the lease held by the claiming moderator"""
+    
+    class Meta(PostSerializer.Meta):
+        fields = PostSerializer.Meta.fields + ['claimed_by', 'claim_expires_at']
+        read_only_fields = fields
+
+class ClaimRequestSerializer(serializers.Serializer):
+    """Validates a request to lease the next pending posts"""
+    count = serializers.IntegerField(
+        min_value=1, max_value=getattr(settings, 'POST_CLAIM_MAX', 50), default=10
+    )
+    lease_seconds = serializers.IntegerField(
+        min_value=1,
+        max_value=getattr(settings, 'POST_CLAIM_MAX_LEASE_SECONDS', 3600),
+        required=False
+    )
+
+class ClaimReleaseSerializer(serializers.Serializer):
+    """Validates a request to give leases back"""
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False)
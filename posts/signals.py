@@ -0,0 +1,61 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal, receiver
+from users.dashboard import invalidate_admin_dashboard
+from .cache import bump_feed_version
+from .models import AuthorPostStats, Post, PostTombstone
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Sent once per bulk moderation UPDATE by posts.moderation (post_save does not fire)
+posts_moderated = Signal()
+
+@receiver(post_save, sender=Post)
+def post_saved_handler(sender, instance, created, **kwargs):
+    """Handle post creation and update events"""
+    # Caches are invalidated after commit: invalidating inside Post.save's
+    # transaction lets a concurrent reader re-cache the pre-commit state
+    transaction.on_commit(invalidate_admin_dashboard)
+    
+    previous = getattr(instance, '_loaded_status', None)
+    if created:
+        AuthorPostStats.adjust(instance.author_id, **{instance.status: 1})
+    elif previous is not None and previous != instance.status:
+        AuthorPostStats.adjust(instance.author_id, **{previous: -1, instance.status: 1})
+    
+    # The shared feed only shows approved posts, so only they invalidate it
+    if 'approved' in (previous, instance.status):
+        transaction.on_commit(bump_feed_version)
+    
+    # Readers who only saw it while approved must drop it on their next sync
+    if previous == 'approved' and instance.status != 'approved':
+        PostTombstone.objects.create(
+            post_id=instance.pk, author_id=instance.author_id,
+            previous_status=previous, reason='unapproved'
+        )
+
+@receiver(post_delete, sender=Post)
+def post_deleted_handler(sender, instance, **kwargs):
+    """Handle post deletion events"""
+    transaction.on_commit(invalidate_admin_dashboard)
+    # A missing row is rebuilt on next read; never recreate it while the
+    # author itself may be cascading away
+    status = getattr(instance, '_loaded_status', None) or instance.status
+    AuthorPostStats.adjust(instance.author_id, rebuild_missing=False, **{status: -1})
+    PostTombstone.objects.create(
+        post_id=instance.pk, author_id=instance.author_id,
+        previous_status=status, reason='deleted'
+    )
+    
+    if status == 'approved':
+        transaction.on_commit(bump_feed_version)
+
+
+@receiver(posts_moderated)
+def posts_moderated_handler(sender, action, post_ids, moderator, skipped_ids, **kwargs):
+    """Audit a bulk moderation with one log entry"""
+    logger.info(
+        f'Bulk {action} by {moderator.email}: {len(post_ids)} posts updated, '
+        f'{len(skipped_ids)} skipped (ids {post_ids[:20]}{"..." if len(post_ids) > 20 else ""})'
+    )
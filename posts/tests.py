@@ -1,3 +1,779 @@
-from django.test import TestCase
+import asyncio
+import json
+from datetime import timedelta
+from unittest.mock import patch
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from rest_framework.test import APITestCase
+from rest_framework import status
+from users.serializers import CustomTokenObtainPairSerializer
+from .events import OVERFLOW, BaseBroker, LocalBroker, get_broker, hub, status_event
+from .models import AuthorPostStats, Post
+
+User = get_user_model()
+
+class PostTestMixin:
+    """Shared users and helpers for post tests"""
+    
+    def setUp(self):
+        from django.core.cache import caches
+        for cache in caches.all():
+            cache.clear()
+        
+        self.admin = User.objects.create_user(
+            email='admin@example.com',
+            full_name='Admin User',
+            role='admin'
+        )
+        self.editor = User.objects.create_user(
+            email='editor@example.com',
+            full_name='Editor User',
+            role='editor'
+        )
+        self.user = User.objects.create_user(
+            email='user@example.com',
+            full_name='Regular User',
+            role='user'
+        )
+    
+    def login(self, user):
+        """Helper to authenticate the test client as user"""
+        token = CustomTokenObtainPairSerializer.get_token(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    
+    def create_post(self, status='pending', author=None, **kwargs):
+        return Post.objects.create(
+            title=kwargs.pop('title', 'Post title'),
+            content=kwargs.pop('content', 'Post content'),
+            author=author or self.editor,
+            status=status,
+            **kwargs
+        )
+
+class AuthorPostStatsTest(PostTestMixin, APITestCase):
+    """Test denormalized per-author post counters"""
+    
+    def counters(self):
+        return AuthorPostStats.objects.get(author=self.editor)
+    
+    def test_counters_follow_post_lifecycle(self):
+        """Test counters track creation, approval and deletion"""
+        post = self.create_post()
+        self.create_post(status='draft')
+        self.assertEqual(self.counters().pending_posts, 1)
+        self.assertEqual(self.counters().draft_posts, 1)
+        
+        self.login(self.admin)
+        url = reverse('post_approval', kwargs={'pk': post.pk})
+        response = self.client.patch(url, {'action': 'approve'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.counters().pending_posts, 0)
+        self.assertEqual(self.counters().approved_posts, 1)
+        
+        Post.objects.get(pk=post.pk).delete()
+        self.assertEqual(self.counters().approved_posts, 0)
+        self.assertEqual(self.counters().total_posts, 1)
+    
+    def test_stale_instances_do_not_double_count(self):
+        """Test transitions come from the stored status, not a stale in-memory copy"""
+        post = self.create_post()
+        first, second = Post.objects.get(pk=post.pk), Post.objects.get(pk=post.pk)
+        
+        first.status = 'approved'
+        first.save()
+        second.status = 'approved'
+        second.save()
+        self.assertEqual(self.counters().pending_posts, 0)
+        self.assertEqual(self.counters().approved_posts, 1)
+        
+        first.delete()
+        second.delete()
+        self.assertEqual(self.counters().approved_posts, 0)
+        self.assertEqual(self.counters().total_posts, 0)
+    
+    def test_rebuild_command(self):
+        """Test the reconciliation command recomputes counters"""
+        self.create_post()
+        self.create_post(status='rejected')
+        AuthorPostStats.objects.update(pending_posts=42)
+        
+        call_command('rebuild_post_counters', stdout=open('/dev/null', 'w'))
+        self.assertEqual(self.counters().pending_posts, 1)
+        self.assertEqual(self.counters().rejected_posts, 1)
+    
+    def test_benchmark_requires_confirmation(self):
+        """Test the index benchmark refuses to drop indexes unless confirmed"""
+        with self.assertRaises(CommandError):
+            call_command('benchmark_post_queries', stdout=open('/dev/null', 'w'))
+        self.assertFalse(User.objects.filter(email__startswith='bench-editor-').exists())
+    
+    def test_editor_dashboard_uses_counters(self):
+        """Test the editor dashboard reads counters instead of counting"""
+        self.create_post()
+        self.create_post(status='approved')
+        self.login(self.editor)
+        
+        # auth + counters row + recent posts
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('editor_dashboard'))
+        self.assertEqual(response.data['my_posts'], 2)
+        self.assertEqual(response.data['pending_posts'], 1)
+        self.assertEqual(len(response.data['recent_posts']), 2)
+
+class PostCursorPaginationTest(PostTestMixin, APITestCase):
+    """Test keyset pagination of post listings"""
+    
+    def test_pages_follow_cursor_without_duplicates(self):
+        """Test walking every page returns each post once, newest first"""
+        from datetime import timedelta
+        from django.utils import timezone
+        
+        now = timezone.now()
+        # Two posts share a timestamp to exercise the id tie-breaker
+        posts = [self.create_post(created_at=now - timedelta(minutes=i // 2)) for i in range(7)]
+        self.login(self.admin)
+        
+        seen = []
+        url = reverse('pending_posts') + '?page_size=3&count=true'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data['count'], 7)
+            seen.extend(post['id'] for post in response.data['results'])
+            url = response.data['next']
+        
+        expected = sorted(posts, key=lambda post: (post.created_at, post.id), reverse=True)
+        self.assertEqual(seen, [post.id for post in expected])
+    
+    def test_count_is_optional(self):
+        """Test the total count is skipped unless requested"""
+        self.create_post(status='approved')
+        self.login(self.user)
+        
+        response = self.client.get(reverse('post_list'))
+        self.assertNotIn('count', response.data)
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(len(response.data['results']), 1)
+    
+    def test_invalid_cursor(self):
+        self.login(self.user)
+        response = self.client.get(reverse('post_list') + '?cursor=garbage')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+class PostListPayloadTest(PostTestMixin, APITestCase):
+    """Test lightweight post list payloads"""
+    
+    def test_one_query_per_page(self):
+        """Test authors and approvers are joined instead of fetched per row"""
+        for _ in range(5):
+            self.create_post(status='approved', approved_by=self.admin)
+        self.login(self.user)
+        
+        # auth + page
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('post_list'))
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertEqual(response.data['results'][0]['approved_by_name'], 'Admin User')
+    
+    def test_excerpt_replaces_content(self):
+        """Test long content is cut to an excerpt"""
+        self.create_post(status='approved', content='word ' * 200)
+        self.login(self.user)
+        
+        post = self.client.get(reverse('post_list')).data['results'][0]
+        self.assertNotIn('content', post)
+        self.assertTrue(post['excerpt'].endswith('…'))
+        self.assertLessEqual(len(post['excerpt']), 201)
+    
+    def test_sparse_fieldset(self):
+        """Test ?fields= limits the returned columns"""
+        self.create_post(status='approved')
+        self.login(self.user)
+        
+        response = self.client.get(reverse('post_list') + '?fields=id,title')
+        self.assertEqual(set(response.data['results'][0]), {'id', 'title'})
+
+class FeedCacheTest(PostTestMixin, APITestCase):
+    """Test the shared approved-posts feed cache"""
+    
+    def test_user_feed_is_shared_until_approval_changes(self):
+        """Test cached pages are reused and invalidated by approvals"""
+        self.create_post(status='approved')
+        pending = self.create_post(status='pending')
+        self.login(self.user)
+        
+        self.assertEqual(len(self.client.get(reverse('post_list')).data['results']), 1)
+        with self.assertNumQueries(1):  # authentication only
+            response = self.client.get(reverse('post_list'))
+        self.assertEqual(len(response.data['results']), 1)
+        
+        # Pending/draft changes leave the feed alone
+        pending.title = 'Edited'
+        pending.save()
+        with self.assertNumQueries(1):
+            self.client.get(reverse('post_list'))
+        
+        self.login(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse('post_approval', kwargs={'pk': pending.pk}), {'action': 'approve'})
+        
+        self.login(self.user)
+        self.assertEqual(len(self.client.get(reverse('post_list')).data['results']), 2)
+    
+    def test_feed_invalidated_only_after_commit(self):
+        """Test the feed version is bumped when the approval commits, not before"""
+        from .cache import get_feed_version
+        
+        post = self.create_post(status='pending')
+        before = get_feed_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            post.status = 'approved'
+            post.save()
+            self.assertEqual(get_feed_version(), before)
+        self.assertNotEqual(get_feed_version(), before)
+    
+    def test_page_queried_before_bump_is_not_stored_under_new_version(self):
+        """Test a page read before an approval commits is cached under the old version"""
+        from .cache import bump_feed_version
+        from .views import PostListView
+        
+        self.create_post(status='approved')
+        self.login(self.user)
+        
+        # Another request's approval commits after this page was queried
+        original = PostListView.get_paginated_response
+        def approve_then_respond(view, data):
+            self.create_post(status='approved')
+            bump_feed_version()
+            return original(view, data)
+        with patch.object(PostListView, 'get_paginated_response', approve_then_respond):
+            self.assertEqual(len(self.client.get(reverse('post_list')).data['results']), 1)
+        
+        self.assertEqual(len(self.client.get(reverse('post_list')).data['results']), 2)
+    
+    def test_editor_feed_is_not_shared(self):
+        """Test editors, who also see their own posts, bypass the cache"""
+        self.create_post(status='draft')
+        self.login(self.editor)
+        
+        self.assertEqual(len(self.client.get(reverse('post_list')).data['results']), 1)
+        self.login(self.user)
+        self.assertEqual(len(self.client.get(reverse('post_list')).data['results']), 0)
+
+class ConditionalRequestTest(PostTestMixin, APITestCase):
+    """Test ETag / Last-Modified handling on posts"""
+    
+    def test_detail_not_modified(self):
+        """Test a matching If-None-Match returns 304 until the post changes"""
+        post = self.create_post(status='approved')
+        self.login(self.user)
+        url = reverse('post_detail', kwargs={'pk': post.pk})
+        
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+        
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        post.title = 'Changed'
+        post.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_detail_etag_covers_author_name(self):
+        """Test renaming the author changes the ETag although the post is untouched"""
+        post = self.create_post(status='approved')
+        self.login(self.user)
+        url = reverse('post_detail', kwargs={'pk': post.pk})
+        etag = self.client.get(url)['ETag']
+        
+        self.editor.full_name = 'Renamed Editor'
+        self.editor.save(update_fields=['full_name'])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['author_name'], 'Renamed Editor')
+    
+    def test_list_not_modified(self):
+        """Test list pages are validated by the rows in the window"""
+        self.create_post(status='approved')
+        self.login(self.editor)
+        url = reverse('post_list')
+        
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        self.create_post(status='pending')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_if_match_on_patch(self):
+        """Test stale If-Match headers are rejected with 412"""
+        post = self.create_post(status='pending')
+        self.login(self.editor)
+        url = reverse('post_detail', kwargs={'pk': post.pk})
+        etag = self.client.get(url)['ETag']
+        
+        response = self.client.patch(url, {'title': 'First edit'}, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        
+        response = self.client.patch(url, {'title': 'Lost update'}, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+    
+    def test_if_match_checked_on_locked_row(self):
+        """Test the precondition is evaluated on a row locked for the write"""
+        from unittest import mock
+        from django.db import connection
+        from django.db.models import QuerySet
+        
+        post = self.create_post(status='pending')
+        self.login(self.editor)
+        url = reverse('post_detail', kwargs={'pk': post.pk})
+        etag = self.client.get(url)['ETag']
+        
+        original = QuerySet.select_for_update
+        in_transaction = []
+        
+        def select_for_update(queryset, *args, **kwargs):
+            in_transaction.append(connection.in_atomic_block)
+            return original(queryset, *args, **kwargs)
+        
+        with mock.patch.object(QuerySet, 'select_for_update', select_for_update):
+            response = self.client.patch(url, {'title': 'Locked edit'}, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(in_transaction), {True})
+
+class PostSearchTest(PostTestMixin, APITestCase):
+    """Test full-text post search"""
+    
+    def setUp(self):
+        super().setUp()
+        self.approved = self.create_post(
+            status='approved', title='Django performance tips',
+            content='Use select_related to avoid extra queries.'
+        )
+        self.draft = self.create_post(
+            status='draft', title='Draft about performance',
+            content='Not ready yet.'
+        )
+    
+    def search(self, query):
+        return self.client.get(reverse('post_search'), {'q': query}).data['results']
+    
+    def test_ranked_results_with_snippets(self):
+        """Test matches are ranked and highlighted"""
+        self.login(self.admin)
+        results = self.search('performance')
+        
+        self.assertEqual(len(results), 2)
+        ranks = [post['rank'] for post in results]
+        self.assertEqual(ranks, sorted(ranks, reverse=True))
+        self.assertEqual(self.search('queri')[0]['author_name'], 'Editor User')
+        self.assertIn('<mark>', self.search('select_related')[0]['snippet'])
+    
+    def test_snippets_are_escaped(self):
+        """Test post markup comes back escaped around the match markers"""
+        self.login(self.admin)
+        self.create_post(status='approved', title='Markup', content='<script>alert(1)</script> caching tips')
+        
+        snippet = self.search('caching')[0]['snippet']
+        self.assertNotIn('<script>', snippet)
+        self.assertIn('&lt;script&gt;', snippet)
+        self.assertIn('<mark>caching</mark>', snippet)
+    
+    def test_results_respect_visibility(self):
+        """Test users only find approved posts"""
+        self.login(self.user)
+        self.assertEqual([post['id'] for post in self.search('performance')], [self.approved.id])
+    
+    def test_index_follows_updates_and_rebuild(self):
+        """Test edits, deletes and the rebuild command keep the index in sync"""
+        self.login(self.admin)
+        Post.objects.filter(pk=self.draft.pk).update(title='Completely different')
+        self.assertEqual(len(self.search('performance')), 1)
+        
+        self.approved.delete()
+        self.assertEqual(self.search('performance'), [])
+        
+        call_command('rebuild_search_index', stdout=open('/dev/null', 'w'))
+        self.assertEqual(len(self.search('different')), 1)
+
+class PostExportTest(PostTestMixin, APITestCase):
+    """Test streaming post exports"""
+    
+    def export(self, **params):
+        response = self.client.get(reverse('post_export'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return b''.join(response.streaming_content).decode()
+    
+    def test_ndjson_export_with_filters_and_resume(self):
+        """Test NDJSON rows honour status filters and after_id"""
+        import json
+        
+        first = self.create_post(status='approved')
+        self.create_post(status='pending')
+        third = self.create_post(status='approved')
+        self.login(self.admin)
+        
+        rows = [json.loads(line) for line in self.export(status='approved').splitlines()]
+        self.assertEqual([row['id'] for row in rows], [first.id, third.id])
+        
+        rows = [json.loads(line) for line in self.export(after_id=first.id).splitlines()]
+        self.assertEqual(len(rows), 2)
+    
+    def test_csv_export(self):
+        """Test CSV exports start with a header row"""
+        self.create_post()
+        self.login(self.admin)
+        
+        lines = self.export(output='csv').splitlines()
+        self.assertTrue(lines[0].startswith('id,title,content'))
+        self.assertEqual(len(lines), 2)
+    
+    def test_export_is_admin_only(self):
+        self.login(self.editor)
+        response = self.client.get(reverse('post_export'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+class BulkModerationTest(PostTestMixin, APITestCase):
+    """Test bulk approve/reject"""
+    
+    def test_bulk_approve_updates_only_pending_posts(self):
+        """Test one request approves pending posts and reports the rest"""
+        pending = [self.create_post(status='pending') for _ in range(3)]
+        rejected = self.create_post(status='rejected')
+        self.login(self.admin)
+        
+        ids = [post.id for post in pending] + [rejected.id, 99999]
+        with self.assertLogs('posts.signals', level='INFO') as logs:
+            response = self.client.post(reverse('bulk_moderation'), {'ids': ids, 'action': 'approve'}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['updated'], [post.id for post in pending])
+        self.assertEqual(response.data['not_pending'], [rejected.id])
+        self.assertEqual(response.data['not_found'], [99999])
+        self.assertEqual(len(logs.output), 1)
+        
+        self.assertEqual(Post.objects.filter(status='approved', approved_by=self.admin).count(), 3)
+        stats = AuthorPostStats.objects.get(author=self.editor)
+        self.assertEqual((stats.pending_posts, stats.approved_posts), (0, 3))
+    
+    def test_bulk_moderation_stamps_after_locking(self):
+        """Test updated_at is taken once the row locks are held, not before waiting for them"""
+        from .moderation import moderate_posts
+        
+        post = self.create_post(status='pending')
+        clock = {'now': timezone.now()}
+        original = type(Post.objects).select_for_update
+        def slow_lock(manager, *args, **kwargs):
+            clock['now'] += timedelta(seconds=10)
+            return original(manager, *args, **kwargs)
+        
+        with patch('posts.moderation.timezone.now', lambda: clock['now']):
+            with patch.object(type(Post.objects), 'select_for_update', slow_lock):
+                moderate_posts([post.id], 'approve', self.admin)
+        post.refresh_from_db()
+        self.assertEqual(post.updated_at, clock['now'])
+    
+    def test_bulk_reject_sets_reason(self):
+        post = self.create_post(status='pending')
+        self.login(self.admin)
+        
+        response = self.client.post(
+            reverse('bulk_moderation'),
+            {'ids': [post.id], 'action': 'reject', 'rejection_reason': 'Spam'},
+            format='json'
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        post.refresh_from_db()
+        self.assertEqual((post.status, post.rejection_reason), ('rejected', 'Spam'))
+    
+    def test_bulk_moderation_is_admin_only(self):
+        self.login(self.editor)
+        response = self.client.post(reverse('bulk_moderation'), {'ids': [1], 'action': 'approve'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+class ModerationLeaseTest(PostTestMixin, APITestCase):
+    """Test claiming pending posts with leases"""
+    
+    def setUp(self):
+        super().setUp()
+        self.other_admin = User.objects.create_user(
+            email='admin2@example.com', full_name='Second Admin', role='admin'
+        )
+    
+    def claim(self, user, count, **extra):
+        self.login(user)
+        response = self.client.post(reverse('claim_posts'), {'count': count, **extra}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [post['id'] for post in response.data]
+    
+    def test_claims_do_not_overlap(self):
+        """Test two moderators are leased disjoint posts, oldest first"""
+        posts = [self.create_post() for _ in range(5)]
+        self.create_post(status='approved')
+        
+        first = self.claim(self.admin, 3)
+        second = self.claim(self.other_admin, 3)
+        
+        self.assertEqual(first, [post.id for post in posts[:3]])
+        self.assertEqual(second, [post.id for post in posts[3:]])
+    
+    def test_expired_lease_is_claimable(self):
+        post = self.create_post()
+        Post.objects.filter(pk=post.pk).update(
+            claimed_by=self.admin, claim_expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(self.claim(self.other_admin, 1), [post.id])
+    
+    def test_approval_respects_lease(self):
+        """Test a post leased to another admin cannot be approved"""
+        post = self.create_post()
+        self.claim(self.other_admin, 1)
+        
+        self.login(self.admin)
+        url = reverse('post_approval', kwargs={'pk': post.pk})
+        response = self.client.patch(url, {'action': 'approve'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        
+        response = self.client.post(reverse('bulk_moderation'), {'ids': [post.id], 'action': 'approve'}, format='json')
+        self.assertEqual(response.data['claimed_by_other'], [post.id])
+        
+        self.login(self.other_admin)
+        response = self.client.patch(url, {'action': 'approve'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        post.refresh_from_db()
+        self.assertIsNone(post.claimed_by_id)
+    
+    def test_approval_checks_lease_on_locked_row(self):
+        """Test the lease is checked on the row locked for the approval"""
+        from unittest import mock
+        from django.db.models import QuerySet
+        
+        post = self.create_post()
+        original = QuerySet.select_for_update
+        locked = []
+        
+        def select_for_update(queryset, *args, **kwargs):
+            locked.append(queryset.model)
+            return original(queryset, *args, **kwargs)
+        
+        self.login(self.admin)
+        with mock.patch.object(QuerySet, 'select_for_update', select_for_update):
+            response = self.client.patch(
+                reverse('post_approval', kwargs={'pk': post.pk}), {'action': 'approve'}, format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(Post, locked)
+    
+    def test_release_claims(self):
+        post = self.create_post()
+        self.claim(self.admin, 1)
+        
+        response = self.client.delete(reverse('claim_posts'), {}, format='json')
+        self.assertEqual(response.data['released'], 1)
+        self.assertEqual(self.claim(self.other_admin, 1), [post.id])
+
+class AsyncPostViewsTest(PostTestMixin, APITestCase):
+    """Test the native async post endpoints"""
+    
+    def test_async_list_matches_sync_list(self):
+        """Test the async feed returns the same payload and ETag"""
+        for _ in range(3):
+            self.create_post(status='approved')
+        self.create_post(status='pending')
+        self.login(self.editor)
+        
+        sync_response = self.client.get(reverse('post_list'), {'page_size': 2})
+        async_response = self.client.get(reverse('async_post_list'), {'page_size': 2})
+        
+        self.assertEqual(async_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(async_response.json()['results'], json.loads(sync_response.content)['results'])
+        self.assertIn('/api/async/posts/?cursor=', async_response.json()['next'])
+        self.assertEqual(async_response['ETag'], sync_response['ETag'])
+        
+        response = self.client.get(
+            reverse('async_post_list'), {'page_size': 2}, HTTP_IF_NONE_MATCH=async_response['ETag']
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+    
+    def test_async_detail_enforces_visibility(self):
+        post = self.create_post(status='pending')
+        
+        self.login(self.user)
+        response = self.client.get(reverse('async_post_detail', kwargs={'pk': post.pk}))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        
+        self.login(self.editor)
+        response = self.client.get(reverse('async_post_detail', kwargs={'pk': post.pk}))
+        self.assertEqual(response.json()['title'], post.title)
+        
+        response = self.client.get(reverse('async_post_detail', kwargs={'pk': 99999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_async_requires_authentication(self):
+        response = self.client.get(reverse('async_post_list'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+class ModerationEventsTest(PostTestMixin, APITestCase):
+    """Test the moderation event hub and SSE stream"""
+    
+    async def test_stream_delivers_visible_events(self):
+        """Test an editor is told about their own post's approval only"""
+        from asgiref.sync import sync_to_async
+        from django.test import AsyncRequestFactory
+        from .async_views import post_events
+        
+        own, other = await sync_to_async(lambda: (
+            self.create_post(), self.create_post(author=self.admin)
+        ))()
+        token = await sync_to_async(lambda: str(CustomTokenObtainPairSerializer.get_token(self.editor).access_token))()
+        request = AsyncRequestFactory().get('/api/events/posts/', headers={'Authorization': f'Bearer {token}'})
+        
+        response = await post_events(request)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b'retry: 5000\n\n')
+        
+        # The hub subscribes on first read; publish a hidden event, then a visible one
+        pending = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)
+        get_broker().publish(status_event(other.pk, self.admin.pk, 'rejected', 'pending', self.admin.pk))
+        get_broker().publish(status_event(own.pk, self.editor.pk, 'approved', 'pending', self.admin.pk))
+        
+        frame = (await asyncio.wait_for(pending, 1)).decode()
+        self.assertTrue(frame.startswith('id: 1\nevent: post.status'))
+        payload = json.loads(frame.split('data: ')[1])
+        self.assertEqual((payload['post_id'], payload['status']), (own.pk, 'approved'))
+        
+        # A client disconnect cancels the pending read, which unsubscribes
+        waiting = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiting
+        self.assertFalse(hub.subscriptions)
+    
+    async def test_moderator_hidden_from_users(self):
+        """Test users get approval events without the moderator, admins with it"""
+        user_subscription = hub.subscribe(self.user)
+        admin_subscription = hub.subscribe(self.admin)
+        try:
+            hub.dispatch(status_event(1, self.editor.pk, 'approved', 'pending', self.admin.pk))
+            user_event = await user_subscription.get(1)
+            admin_event = await admin_subscription.get(1)
+        finally:
+            hub.unsubscribe(user_subscription)
+            hub.unsubscribe(admin_subscription)
+        
+        self.assertNotIn('moderator_id', user_event)
+        self.assertEqual(user_event['status'], 'approved')
+        self.assertEqual(admin_event['moderator_id'], self.admin.pk)
+    
+    async def test_slow_subscriber_is_cut_off(self):
+        subscription = hub.subscribe(self.user, maxsize=2)
+        try:
+            for post_id in range(3):
+                hub.dispatch(status_event(post_id, self.editor.pk, 'approved', 'pending', self.admin.pk))
+            await asyncio.sleep(0)
+            self.assertIs(await subscription.get(1), OVERFLOW)
+        finally:
+            hub.unsubscribe(subscription)
+    
+    def test_broker_must_implement_publish(self):
+        with self.assertRaises(TypeError):
+            BaseBroker(hub)
+    
+    def test_approval_publishes_after_commit(self):
+        """Test single and bulk moderation hand events to the broker"""
+        posts = [self.create_post() for _ in range(3)]
+        self.login(self.admin)
+        
+        with patch.object(LocalBroker, 'publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.patch(
+                    reverse('post_approval', kwargs={'pk': posts[0].pk}), {'action': 'approve'}, format='json'
+                )
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(
+                    reverse('bulk_moderation'), {'ids': [posts[1].pk, posts[2].pk], 'action': 'reject'}, format='json'
+                )
+        
+        events = [call.args[0] for call in publish.call_args_list]
+        self.assertEqual([event['post_id'] for event in events], [post.pk for post in posts])
+        self.assertEqual([event['status'] for event in events], ['approved', 'rejected', 'rejected'])
+
+@override_settings(POST_CHANGES_SETTLE_SECONDS=0)
+class PostChangesTest(PostTestMixin, APITestCase):
+    """Test delta sync of posts"""
+    
+    def sync(self, since=None, **params):
+        if since:
+            params['since'] = since
+        response = self.client.get(reverse('post_changes'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+    
+    def test_sync_reports_changes_and_removals(self):
+        """Test a reader gets new posts, then only what changed or left view"""
+        kept = self.create_post(status='approved')
+        unapproved = self.create_post(status='approved')
+        deleted = self.create_post(status='approved')
+        self.create_post(status='pending')
+        self.login(self.user)
+        
+        first = self.sync()
+        self.assertEqual({post['id'] for post in first['changed']}, {kept.id, unapproved.id, deleted.id})
+        self.assertEqual(first['removed'], [])
+        
+        self.assertEqual(self.sync(first['watermark'])['changed'], [])
+        
+        new = self.create_post(status='approved')
+        unapproved.status = 'rejected'
+        unapproved.save()
+        deleted_id = deleted.id
+        deleted.delete()
+        
+        second = self.sync(first['watermark'])
+        self.assertEqual([post['id'] for post in second['changed']], [new.id])
+        self.assertEqual(second['removed'], [unapproved.id, deleted_id])
+    
+    def test_editor_keeps_own_unapproved_post(self):
+        post = self.create_post(status='approved')
+        self.login(self.editor)
+        watermark = self.sync()['watermark']
+        
+        post.status = 'rejected'
+        post.save()
+        
+        changes = self.sync(watermark)
+        self.assertEqual([item['id'] for item in changes['changed']], [post.id])
+        self.assertEqual(changes['removed'], [])
+    
+    @override_settings(POST_CHANGES_PAGE_SIZE=2)
+    def test_sync_pages_with_has_more(self):
+        """Test large deltas are returned in pages that cover every post"""
+        posts = [self.create_post(status='approved') for _ in range(5)]
+        self.login(self.user)
+        
+        seen, since = [], None
+        while True:
+            changes = self.sync(since)
+            seen += [post['id'] for post in changes['changed']]
+            since = changes['watermark']
+            if not changes['has_more']:
+                break
+        self.assertEqual(sorted(seen), sorted(post.id for post in posts))
+    
+    def test_invalid_watermark(self):
+        self.login(self.user)
+        response = self.client.get(reverse('post_changes'), {'since': 'garbage'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
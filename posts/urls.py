@@ -1,10 +1,18 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     path('posts/', views.PostListView.as_view(), name='post_list'),
     path('posts/create/', views.PostCreateView.as_view(), name='post_create'),
+    path('posts/changes/', views.PostChangesView.as_view(), name='post_changes'),
+    path('posts/search/', views.PostSearchView.as_view(), name='post_search'),
     path('posts/<int:pk>/', views.PostDetailView.as_view(), name='post_detail'),
+    path('async/posts/', async_views.post_list, name='async_post_list'),
+    path('async/posts/<int:pk>/', async_views.post_detail, name='async_post_detail'),
+    path('events/posts/', async_views.post_events, name='post_events'),
     path('admin/posts/pending/', views.PendingPostsView.as_view(), name='pending_posts'),
+    path('admin/posts/claim/', views.ClaimPostsView.as_view(), name='claim_posts'),
+    path('admin/posts/moderate/', views.BulkModerationView.as_view(), name='bulk_moderation'),
+    path('admin/export/posts/', views.PostExportView.as_view(), name='post_export'),
     path('admin/posts/<int:pk>/approve/', views.PostApprovalView.as_view(), name='post_approval'),
 ]
\ No newline at end of file
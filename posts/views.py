@@ -1,11 +1,29 @@
 from rest_framework import generics, status, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
+from django.db import models, transaction
 from django.shortcuts import get_object_or_404
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
+from .cache import cache_feed_page, get_cached_feed_page, get_feed_version, is_feed_cacheable
+from .changes import collect_changes
 from .models import Post
-from .serializers import PostSerializer, PostListSerializer, PostApprovalSerializer
+from .leases import claim_pending_posts, release_claims
+from .moderation import moderate_posts
+from .search import search_posts
+from .serializers import (
+    PostSerializer,
+    PostListSerializer,
+    PostApprovalSerializer,
+    PostSearchResultSerializer,
+    BulkModerationSerializer,
+    ClaimedPostSerializer,
+    ClaimRequestSerializer,
+    ClaimReleaseSerializer
+)
+from users.exports import parse_after_id, parse_boundary, stream_rows
+from users.conditional import ConditionalRequestMixin, make_etag, timestamp
+from users.pagination import PostCursorPagination
 from users.permissions import IsAdmin, IsEditorOrAdmin
 
 class PostCreateView(generics.CreateAPIView):
@@ -21,25 +39,63 @@ class PostCreateView(generics.CreateAPIView):
     def post(self, request, *args, **kwargs):
         return super().post(request, *args, **kwargs)
 
-class PostListView(generics.ListAPIView):
+def visible_posts(user):
+    """Posts ``user`` may list, based on their role"""
+    if user.role == 'admin':
+        # Admins see all posts
+        return Post.objects.all()
+    if user.role == 'editor':
+        # Editors see their own posts and approved posts
+        return Post.objects.filter(
+            models.Q(author_id=user.pk) | models.Q(status='approved')
+        )
+    # Users see only approved posts
+    return Post.objects.filter(status='approved')
+
+def feed_page_etag(request, count, posts):
+    """ETag for a list page without serializing it.
+    
+    The rows in the window, their last change and the query (fields, page
+    size) identify the representation.
+    """
+    newest = max((post.updated_at for post in posts), default=None)
+    return make_etag('posts', request.GET.urlencode(), count, newest, *(post.pk for post in posts))
+
+class PostListView(ConditionalRequestMixin, generics.ListAPIView):
     """List posts based on user role"""
     serializer_class = PostListSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = PostCursorPagination
     
     def get_queryset(self):
-        user = self.request.user
+        return PostListSerializer.optimize_queryset(visible_posts(self.request.user), self.request)
+    
+    def get_page_etag(self, posts):
+        return feed_page_etag(self.request, self.paginator.count, posts)
+    
+    def list(self, request, *args, **kwargs):
+        # Standard users all see the same approved feed, so share their pages
+        cacheable = is_feed_cacheable(request)
+        version = get_feed_version() if cacheable else None
+        page = get_cached_feed_page(request, version) if cacheable else None
         
-        if user.role == 'admin':
-            # Admins see all posts
-            return Post.objects.all()
-        elif user.role == 'editor':
-            # Editors see their own posts and approved posts
-            return Post.objects.filter(
-                models.Q(author=user) | models.Q(status='approved')
-            )
+        if page is None:
+            posts = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+            etag = self.get_page_etag(posts)
+            not_modified = self.check_preconditions(request, etag)
+            if not_modified is not None:
+                return not_modified
+            
+            serializer = self.get_serializer(posts, many=True)
+            page = {'etag': etag, 'data': self.get_paginated_response(serializer.data).data}
+            if cacheable:
+                cache_feed_page(request, version, page)
         else:
-            # Users see only approved posts
-            return Post.objects.filter(status='approved')
+            not_modified = self.check_preconditions(request, page['etag'])
+            if not_modified is not None:
+                return not_modified
+        
+        return self.set_validators(Response(page['data']), page['etag'])
     
     @swagger_auto_schema(
         operation_description="List posts based on user role",
@@ -48,28 +104,123 @@ class PostListView(generics.ListAPIView):
     def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
 
-class PostDetailView(generics.RetrieveUpdateDestroyAPIView):
+class PostSearchView(generics.GenericAPIView):
+    """Ranked full-text search over the posts the user may see"""
+    serializer_class = PostSearchResultSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    max_limit = 50
+    
+    @swagger_auto_schema(
+        operation_description="Full-text search over posts, ranked, with highlighted snippets",
+        manual_parameters=[
+            openapi.Parameter('q', openapi.IN_QUERY, type=openapi.TYPE_STRING, required=True),
+            openapi.Parameter('limit', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+        ],
+        responses={200: PostSearchResultSerializer(many=True)}
+    )
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'The q parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), self.max_limit)
+        except ValueError:
+            limit = 20
+        
+        results = search_posts(query, request.user, limit=limit)
+        return Response({'results': self.get_serializer(results, many=True).data})
+
+def post_validators(post):
+    """Strong ETag and Last-Modified for the detail representation.
+    
+    ``author_name`` and ``approved_by_name`` can change without the post's
+    ``updated_at`` moving, so the ETag covers them too; callers load both
+    users with ``select_related``.
+    """
+    approved_by_name = post.approved_by.full_name if post.approved_by_id else None
+    etag = make_etag('post', post.pk, post.updated_at.isoformat(), post.author.full_name, approved_by_name)
+    return etag, timestamp(post.updated_at)
+
+class PostChangesView(generics.GenericAPIView):
+    """Delta sync: posts changed or removed since a watermark"""
+    serializer_class = PostListSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    @swagger_auto_schema(
+        operation_description=(
+            "Posts created/updated and ids removed from view since the opaque "
+            "?since= watermark. Store the returned watermark and call again; "
+            "repeat immediately while has_more is true. Omit since for a full sync."
+        ),
+        manual_parameters=[
+            openapi.Parameter('since', openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter('fields', openapi.IN_QUERY, type=openapi.TYPE_STRING),
+        ]
+    )
+    def get(self, request, *args, **kwargs):
+        posts = PostListSerializer.optimize_queryset(visible_posts(request.user), request)
+        changes = collect_changes(posts, request.user, since=request.query_params.get('since'))
+        changes['changed'] = self.get_serializer(changes['changed'], many=True).data
+        return Response(changes)
+
+class PostDetailView(ConditionalRequestMixin, generics.RetrieveUpdateDestroyAPIView):
     """View, update, or delete specific post"""
     queryset = Post.objects.all()
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_object(self):
-        post = get_object_or_404(Post, pk=self.kwargs['pk'])
+        # update() asks for the post several times (preconditions, the
+        # update itself, the ownership check); load it once per request
+        if getattr(self, '_post', None) is not None:
+            return self._post
+        
+        # author_name / approved_by_name are rendered on every response
+        queryset = Post.objects.select_related('author', 'approved_by')
+        if getattr(self, 'lock_for_update', False):
+            queryset = queryset.select_for_update(of=('self',))
+        post = get_object_or_404(queryset, pk=self.kwargs['pk'])
         
         # Check if user can view this post
         if not post.can_be_viewed_by(self.request.user):
             from rest_framework.exceptions import PermissionDenied
             raise PermissionDenied("You don't have permission to view this post")
         
+        self._post = post
         return post
     
+    def get_validators(self, post):
+        return post_validators(post)
+    
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag, last_modified = self.get_validators(instance)
+        not_modified = self.check_preconditions(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        
+        response = Response(self.get_serializer(instance).data)
+        return self.set_validators(response, etag, last_modified)
+    
+    def update(self, request, *args, **kwargs):
+        # If-Match gives clients optimistic concurrency on edits
+        if not self.has_write_preconditions(request):
+            response = super().update(request, *args, **kwargs)
+            return self.set_validators(response, *self.get_validators(self.get_object()))
+        
+        with transaction.atomic():
+            self.lock_for_update = True
+            self.check_preconditions(request, *self.get_validators(self.get_object()))
+            response = super().update(request, *args, **kwargs)
+        return self.set_validators(response, *self.get_validators(self.get_object()))
+    
     def perform_update(self, serializer):
         # Only allow author or admin to update
         post = self.get_object()
         user = self.request.user
         
-        if post.author != user and user.role != 'admin':
+        if post.author_id != user.pk and user.role != 'admin':
             from rest_framework.exceptions import PermissionDenied
             raise PermissionDenied("You can only edit your own posts")
         
@@ -79,7 +230,7 @@ class PostDetailView(generics.RetrieveUpdateDestroyAPIView):
         # Only allow author or admin to delete
         user = self.request.user
         
-        if instance.author != user and user.role != 'admin':
+        if instance.author_id != user.pk and user.role != 'admin':
             from rest_framework.exceptions import PermissionDenied
             raise PermissionDenied("You can only delete your own posts")
         
@@ -89,9 +240,12 @@ class PendingPostsView(generics.ListAPIView):
     """Admin view for pending posts"""
     serializer_class = PostListSerializer
     permission_classes = [IsAdmin]
+    pagination_class = PostCursorPagination
     
     def get_queryset(self):
-        return Post.objects.filter(status='pending')
+        return PostListSerializer.optimize_queryset(
+            Post.objects.filter(status='pending'), self.request
+        )
     
     @swagger_auto_schema(
         operation_description="View all pending posts (admin only)",
@@ -100,6 +254,43 @@ class PendingPostsView(generics.ListAPIView):
     def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
 
+class PostExportView(generics.GenericAPIView):
+    """Admin-only streaming export of posts as NDJSON or CSV"""
+    queryset = Post.objects.all()
+    permission_classes = [IsAdmin]
+    export_fields = [
+        'id', 'title', 'content', 'author_id', 'author__email', 'status',
+        'created_at', 'updated_at', 'approved_by_id', 'approved_at', 'rejection_reason'
+    ]
+    
+    @swagger_auto_schema(
+        operation_description="Stream all posts (filters: status, created_after, created_before; resume with after_id)",
+        manual_parameters=[
+            openapi.Parameter('output', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=['ndjson', 'csv']),
+            openapi.Parameter('status', openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter('created_after', openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter('created_before', openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter('after_id', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+        ]
+    )
+    def get(self, request, *args, **kwargs):
+        params = request.query_params
+        queryset = Post.objects.all()
+        
+        if params.get('status'):
+            queryset = queryset.filter(status=params['status'])
+        created_after = parse_boundary(params.get('created_after'), 'created_after')
+        if created_after:
+            queryset = queryset.filter(created_at__gte=created_after)
+        created_before = parse_boundary(params.get('created_before'), 'created_before')
+        if created_before:
+            queryset = queryset.filter(created_at__lt=created_before)
+        after_id = parse_after_id(request)
+        if after_id is not None:
+            queryset = queryset.filter(id__gt=after_id)
+        
+        return stream_rows(queryset, self.export_fields, params.get('output', 'ndjson'))
+
 class PostApprovalView(generics.UpdateAPIView):
     """Admin approve/reject posts"""
     queryset = Post.objects.all()
@@ -107,19 +298,86 @@ class PostApprovalView(generics.UpdateAPIView):
     permission_classes = [IsAdmin]
     
     def get_object(self):
-        return get_object_or_404(Post, pk=self.kwargs['pk'], status='pending')
+        # Locked so the lease check, the pending check and the save see one
+        # version of the row; a concurrent approval waits and then finds the
+        # post no longer pending
+        return get_object_or_404(Post.objects.select_for_update(), pk=self.kwargs['pk'], status='pending')
     
     @swagger_auto_schema(
         operation_description="Approve or reject a pending post",
         request_body=PostApprovalSerializer,
-        responses={200: PostSerializer}
+        responses={200: PostSerializer, 409: 'Post is leased to another moderator'}
     )
     def patch(self, request, *args, **kwargs):
-        post = self.get_object()
-        serializer = self.get_serializer(post, data=request.data, partial=True)
-        serializer.is_valid(raise_exception=True)
-        updated_post = serializer.save()
+        with transaction.atomic():
+            post = self.get_object()
+            if post.is_claimed_by_other(request.user):
+                return Response({
+                    'error': 'This post is claimed by another moderator',
+                    'claim_expires_at': post.claim_expires_at
+                }, status=status.HTTP_409_CONFLICT)
+            
+            serializer = self.get_serializer(post, data=request.data, partial=True)
+            serializer.is_valid(raise_exception=True)
+            updated_post = serializer.save()
         
         # Return updated post data
         response_serializer = PostSerializer(updated_post)
         return Response(response_serializer.data)
+
+
+class BulkModerationView(generics.GenericAPIView):
+    """Admin approve/reject many pending posts at once"""
+    queryset = Post.objects.all()
+    serializer_class = BulkModerationSerializer
+    permission_classes = [IsAdmin]
+    
+    @swagger_auto_schema(
+        operation_description="Approve or reject a list of pending posts in one update",
+        request_body=BulkModerationSerializer
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        result = moderate_posts(
+            serializer.validated_data['ids'],
+            serializer.validated_data['action'],
+            request.user,
+            rejection_reason=serializer.validated_data['rejection_reason'],
+        )
+        return Response(result)
+
+
+class ClaimPostsView(generics.GenericAPIView):
+    """Admin lease of the next pending posts, so moderators never collide"""
+    queryset = Post.objects.all()
+    serializer_class = ClaimRequestSerializer
+    permission_classes = [IsAdmin]
+    
+    @swagger_auto_schema(
+        operation_description="Lease the oldest unclaimed pending posts to the current admin",
+        request_body=ClaimRequestSerializer,
+        responses={200: ClaimedPostSerializer(many=True)}
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        posts = claim_pending_posts(
+            request.user,
+            serializer.validated_data['count'],
+            lease_seconds=serializer.validated_data.get('lease_seconds'),
+        )
+        return Response(ClaimedPostSerializer(posts, many=True).data)
+    
+    @swagger_auto_schema(
+        operation_description="Release the current admin's leases (all, or the given ids)",
+        request_body=ClaimReleaseSerializer
+    )
+    def delete(self, request, *args, **kwargs):
+        serializer = ClaimReleaseSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        released = release_claims(request.user, serializer.validated_data.get('ids'))
+        return Response({'released': released})
@@ -7,3 +7,9 @@ class UsersConfig(AppConfig):
     
     def ready(self):
         import users.signals
+        from django.conf import settings
+        from django.db.backends.signals import connection_created
+        from .instrumentation import install_query_recorder
+        
+        if getattr(settings, 'PERF_INSTRUMENTATION_ENABLED', True):
+            connection_created.connect(install_query_recorder)
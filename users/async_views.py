@@ -0,0 +1,48 @@
+from asgiref.sync import sync_to_async
+from rest_framework import permissions
+from .async_api import async_api_view, json_response, not_modified, with_validators
+from .dashboard import aget_admin_stats
+from .permissions import IsAdmin, IsEditorOrAdmin
+from .serializers import UserSerializer
+from .views import profile_etag
+
+@async_api_view([permissions.IsAuthenticated])
+async def user_profile(request):
+    """Async read-only ``UserProfileView``"""
+    etag = profile_etag(request.user)
+    unchanged = not_modified(request, etag)
+    if unchanged is not None:
+        return unchanged
+    return with_validators(json_response(UserSerializer(request.user).data), etag)
+
+@async_api_view([IsAdmin])
+async def admin_dashboard(request):
+    """Async ``admin_dashboard`` served from the same shared snapshot"""
+    return json_response(await aget_admin_stats())
+
+@async_api_view([IsEditorOrAdmin])
+async def editor_dashboard(request):
+    """Async ``editor_dashboard``"""
+    from posts.models import AuthorPostStats, Post
+    
+    counters = await AuthorPostStats.objects.filter(author_id=request.user.pk).afirst()
+    if counters is None:
+        # One-off per author, not worth an async rewrite
+        counters = await sync_to_async(AuthorPostStats.rebuild_for)(request.user.pk)
+    
+    recent_posts = Post.objects.filter(author_id=request.user.pk).order_by('-created_at').values(
+        'id', 'title', 'status', 'created_at'
+    )[:5]
+    
+    return json_response({
+        'message': 'Editor dashboard loaded successfully',
+        'my_posts': counters.total_posts,
+        'pending_posts': counters.pending_posts,
+        'approved_posts': counters.approved_posts,
+        'rejected_posts': counters.rejected_posts,
+        'recent_posts': [
+            {**post, 'created_at': post['created_at'].isoformat()}
+            async for post in recent_posts
+        ],
+        'user_role': request.user.role
+    })
@@ -0,0 +1,103 @@
+from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from .revocation import get_token_version, is_token_current, remember_token_version
+
+User = get_user_model()
+
+class ClaimsUser(TokenUser):
+    """Stateless user built from the claims added by CustomTokenObtainPairSerializer.
+
+    Role checks (``IsAdmin``, ``IsEditorOrAdmin``, ``Post.can_be_viewed_by``)
+    only need ``id`` and ``role``, so they run without touching the database.
+    Anything not carried in the token is read from the real ``User`` row,
+    which is loaded lazily on first access and then cached.
+    """
+
+    @cached_property
+    def instance(self):
+        """The backing ``User`` row, fetched on first use"""
+        return User.objects.get(pk=self.id)
+
+    @cached_property
+    def email(self):
+        return self.token.get('email') or self.instance.email
+
+    @cached_property
+    def role(self):
+        return self.token.get('role') or self.instance.role
+
+    @cached_property
+    def full_name(self):
+        return self.token.get('full_name') or self.instance.full_name
+
+    def is_admin(self):
+        return self.role == 'admin'
+
+    def is_editor(self):
+        return self.role == 'editor'
+
+    def is_standard_user(self):
+        return self.role == 'user'
+
+    def __str__(self):
+        return f"{self.full_name} ({self.email}) - {self.role}"
+
+    def __eq__(self, other):
+        if isinstance(other, (TokenUser, User)):
+            return self.pk == other.pk
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __getattr__(self, attr):
+        # Fall back to custom claims first, then to the database row
+        if attr.startswith('_') or attr == 'token':
+            raise AttributeError(attr)
+        if attr in self.token:
+            return self.token[attr]
+        return getattr(self.instance, attr)
+
+def get_user_instance(user):
+    """Return the ``User`` row for ``user``, loading it if it is claim-backed"""
+    if isinstance(user, ClaimsUser):
+        return user.instance
+    return user
+
+def token_revoked():
+    return AuthenticationFailed('Token has been revoked', code='token_revoked')
+
+class VersionedJWTAuthentication(JWTAuthentication):
+    """JWT authentication that rejects tokens revoked through ``User.token_version``"""
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+
+        # The row is already loaded, so refresh the shared cache for free
+        remember_token_version(user.pk, user.token_version)
+        if not is_token_current(validated_token, user.token_version):
+            raise token_revoked()
+
+        return user
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """Opt-in JWT authentication that skips the per-request user lookup.
+
+    Enable it by replacing ``VersionedJWTAuthentication`` in
+    ``REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES']``. Revocation is
+    checked against the in-process token version cache.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken('Token contained no recognizable user identification')
+
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        if not is_token_current(validated_token, get_token_version(user_id)):
+            raise token_revoked()
+
+        return ClaimsUser(validated_token)
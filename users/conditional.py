@@ -0,0 +1,51 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'The resource has been modified since you last fetched it.'
+    default_code = 'precondition_failed'
+
+def make_etag(*parts):
+    """Strong ETag from cheap validator parts such as ids and timestamps"""
+    raw = '|'.join(str(part) for part in parts)
+    return quote_etag(hashlib.sha1(raw.encode()).hexdigest())
+
+def timestamp(value):
+    """Whole-second timestamp for Last-Modified, or None"""
+    return int(value.timestamp()) if value is not None else None
+
+class ConditionalRequestMixin:
+    """ETag / Last-Modified helpers for DRF views.
+    
+    ``check_preconditions`` runs before any serializer work: it answers
+    ``If-None-Match`` / ``If-Modified-Since`` on reads with a 304 and raises
+    412 for a failed ``If-Match`` on writes (optimistic concurrency).
+    """
+    
+    def check_preconditions(self, request, etag, last_modified=None):
+        result = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if result is None:
+            return None
+        if result.status_code == status.HTTP_412_PRECONDITION_FAILED:
+            raise PreconditionFailed()
+        return self.set_validators(Response(status=status.HTTP_304_NOT_MODIFIED), etag, last_modified)
+    
+    def has_write_preconditions(self, request):
+        """Whether the write must be checked against the stored version.
+        
+        Views lock the row for such writes so the check and the save see the
+        same version; two writers holding the same ETag cannot both succeed.
+        """
+        return 'If-Match' in request.headers or 'If-Unmodified-Since' in request.headers
+    
+    def set_validators(self, response, etag, last_modified=None):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
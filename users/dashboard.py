@@ -0,0 +1,159 @@
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+from .metrics import record_cache_lookup
+from .models import User
+
+SNAPSHOT_KEY = 'admin_dashboard:snapshot'
+VERSION_KEY = 'admin_dashboard:version'
+LOCK_KEY = 'admin_dashboard:lock'
+LOCK_TIMEOUT = 30
+
+def admin_stats_aggregates():
+    """Conditional aggregates for the user and post tables"""
+    user_stats = dict(
+        total_users=Count('pk', filter=Q(role='user')),
+        total_editors=Count('pk', filter=Q(role='editor')),
+        total_admins=Count('pk', filter=Q(role='admin')),
+        active_users=Count('pk', filter=Q(is_active=True)),
+        recent_registrations=Count(
+            'pk', filter=Q(date_joined__gte=timezone.now() - timedelta(days=7))
+        ),
+    )
+    post_stats = dict(
+        total_posts=Count('pk'),
+        pending_posts=Count('pk', filter=Q(status='pending')),
+        approved_posts=Count('pk', filter=Q(status='approved')),
+        rejected_posts=Count('pk', filter=Q(status='rejected')),
+    )
+    return user_stats, post_stats
+
+def compute_admin_stats():
+    """Collect dashboard statistics with one aggregate query per table"""
+    from posts.models import Post
+    
+    user_stats, post_stats = admin_stats_aggregates()
+    stats = User.objects.aggregate(**user_stats)
+    stats.update(Post.objects.aggregate(**post_stats))
+    return stats
+
+async def acompute_admin_stats():
+    """Async ORM version of ``compute_admin_stats``"""
+    from posts.models import Post
+    
+    user_stats, post_stats = admin_stats_aggregates()
+    stats = await User.objects.aaggregate(**user_stats)
+    stats.update(await Post.objects.aaggregate(**post_stats))
+    return stats
+
+def invalidate_admin_dashboard():
+    """Mark the snapshot stale; called from User and Post signals"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, timeout=None)
+
+def _is_stale(snapshot, version):
+    age = time.time() - snapshot['computed_at']
+    if age >= getattr(settings, 'ADMIN_DASHBOARD_MAX_AGE', 300):
+        return True
+    return snapshot['version'] != version and age >= getattr(settings, 'ADMIN_DASHBOARD_MIN_REFRESH', 5)
+
+def _refresh(version):
+    stats = compute_admin_stats()
+    snapshot = {'stats': stats, 'version': version, 'computed_at': time.time()}
+    cache.set(SNAPSHOT_KEY, snapshot, timeout=None)
+    return snapshot
+
+def _refresh_once(version):
+    """Refresh if this worker wins the lock, else return None"""
+    token = uuid.uuid4().hex
+    if not cache.add(LOCK_KEY, token, timeout=LOCK_TIMEOUT):
+        return None
+    try:
+        return _refresh(version)
+    finally:
+        # A refresh that outlived the lock must not release the next holder's.
+        # The cache API has no compare-and-delete; the window left is tiny
+        if cache.get(LOCK_KEY) == token:
+            cache.delete(LOCK_KEY)
+
+def _wait_for_snapshot():
+    deadline = time.monotonic() + getattr(settings, 'ADMIN_DASHBOARD_COLD_WAIT', 5)
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        snapshot = cache.get(SNAPSHOT_KEY)
+        if snapshot is not None:
+            return snapshot
+    return None
+
+def get_admin_stats():
+    """Return dashboard statistics from the shared snapshot.
+    
+    When the snapshot is stale only the worker that wins the lock recomputes
+    it; everyone else keeps serving the previous snapshot meanwhile. On a
+    cold start the others wait up to ``ADMIN_DASHBOARD_COLD_WAIT`` seconds
+    for the winner's snapshot, and only compute it themselves if it never
+    arrives.
+    """
+    version = cache.get(VERSION_KEY, 0)
+    snapshot = cache.get(SNAPSHOT_KEY)
+    record_cache_lookup('admin_dashboard', snapshot is not None)
+    
+    if snapshot is None:
+        snapshot = _refresh_once(version) or _wait_for_snapshot() or _refresh(version)
+    elif _is_stale(snapshot, version):
+        snapshot = _refresh_once(version) or snapshot
+    
+    return _snapshot_stats(snapshot)
+
+def _snapshot_stats(snapshot):
+    stats = dict(snapshot['stats'])
+    stats['generated_at'] = datetime.fromtimestamp(
+        snapshot['computed_at'], tz=timezone.get_current_timezone()
+    ).isoformat()
+    return stats
+
+async def _arefresh(version):
+    stats = await acompute_admin_stats()
+    snapshot = {'stats': stats, 'version': version, 'computed_at': time.time()}
+    await cache.aset(SNAPSHOT_KEY, snapshot, timeout=None)
+    return snapshot
+
+async def _arefresh_once(version):
+    token = uuid.uuid4().hex
+    if not await cache.aadd(LOCK_KEY, token, timeout=LOCK_TIMEOUT):
+        return None
+    try:
+        return await _arefresh(version)
+    finally:
+        if await cache.aget(LOCK_KEY) == token:
+            await cache.adelete(LOCK_KEY)
+
+async def _await_snapshot():
+    deadline = time.monotonic() + getattr(settings, 'ADMIN_DASHBOARD_COLD_WAIT', 5)
+    while time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+        snapshot = await cache.aget(SNAPSHOT_KEY)
+        if snapshot is not None:
+            return snapshot
+    return None
+
+async def aget_admin_stats():
+    """Async version of ``get_admin_stats`` sharing the same snapshot and lock"""
+    version = await cache.aget(VERSION_KEY, 0)
+    snapshot = await cache.aget(SNAPSHOT_KEY)
+    record_cache_lookup('admin_dashboard', snapshot is not None)
+    
+    if snapshot is None:
+        snapshot = await _arefresh_once(version) or await _await_snapshot() or await _arefresh(version)
+    elif _is_stale(snapshot, version):
+        snapshot = await _arefresh_once(version) or snapshot
+    
+    return _snapshot_stats(snapshot)
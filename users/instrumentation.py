@@ -0,0 +1,236 @@
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.renderers import JSONRenderer
+from .metrics import record_request
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('request_metrics', default=None)
+
+class RequestMetrics:
+    """Timings and SQL statistics gathered while one request is handled"""
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.wall = None
+        self.timings = {'db': 0.0, 'jwt': 0.0, 'serialize': 0.0}
+        self.queries = 0
+        self.statements = Counter()
+        self.tags = {}
+    
+    def add(self, name, seconds):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+    
+    def tag(self, **tags):
+        """Attach request facts (user, role, auth failure...) to the record"""
+        self.tags.update(tags)
+    
+    def record_query(self, wrapper_execute, sql, params, many, context):
+        # connection.execute_wrapper hook
+        started = time.perf_counter()
+        try:
+            return wrapper_execute(sql, params, many, context)
+        finally:
+            self.add('db', time.perf_counter() - started)
+            self.queries += 1
+            self.statements[sql] += 1
+    
+    def repeated_statement(self):
+        """The most repeated SQL and its count; an N+1 shows up here"""
+        if not self.statements:
+            return None, 0
+        return self.statements.most_common(1)[0]
+    
+    def server_timing(self):
+        parts = [f'total;dur={self.wall * 1000:.1f}']
+        parts.append(f'db;dur={self.timings["db"] * 1000:.1f};desc="{self.queries} queries"')
+        for name in ('jwt', 'serialize'):
+            parts.append(f'{name};dur={self.timings[name] * 1000:.1f}')
+        return ', '.join(parts)
+    
+    def as_dict(self):
+        return {
+            'wall_ms': round(self.wall * 1000, 2),
+            **{f'{name}_ms': round(value * 1000, 2) for name, value in self.timings.items()},
+            'queries': self.queries,
+            **self.tags,
+        }
+
+def current_metrics():
+    """The recorder for the request being handled, or None outside one"""
+    return _current.get()
+
+@contextmanager
+def timed(name):
+    """Add the block's duration to the current request's ``name`` timing"""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add(name, time.perf_counter() - started)
+
+def record_query(execute, sql, params, many, context):
+    """``execute_wrapper`` on every connection, feeding the current request's recorder.
+    
+    The recorder is found through a context variable, which ``sync_to_async``
+    carries into its worker threads, so ORM calls made from async views are
+    counted against the request that made them.
+    """
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics.record_query(execute, sql, params, many, context)
+
+def install_query_recorder(sender=None, connection=None, **kwargs):
+    """``connection_created`` receiver; connection wrappers are per thread"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+class TimedJSONRenderer(JSONRenderer):
+    """DRF JSON renderer that adds its encoding time to the ``serialize`` timing.
+    
+    ``to_representation`` runs earlier, in the view; response serializers
+    time it with ``users.serializers.TimedRepresentationMixin``.
+    """
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timed('serialize'):
+            return super().render(data, accepted_media_type, renderer_context)
+
+def query_budget(route):
+    budgets = getattr(settings, 'PERF_QUERY_BUDGETS', {})
+    return budgets.get(route, getattr(settings, 'PERF_DEFAULT_QUERY_BUDGET', 20))
+
+class PerformanceMiddleware:
+    """Record wall, SQL, JWT and serializer time for each API request.
+    
+    Results go out as a ``Server-Timing`` header and one structured
+    ``users.instrumentation`` log record per request; streaming responses
+    get only the log record, written once the body has been sent. A request whose query
+    count exceeds its route's budget (``PERF_QUERY_BUDGETS`` by URL name,
+    else ``PERF_DEFAULT_QUERY_BUDGET``) is logged as a likely N+1. Install it
+    first in ``MIDDLEWARE`` so it covers the other middleware too.
+    """
+    
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response):
+        if not getattr(settings, 'PERF_INSTRUMENTATION_ENABLED', True):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.prefix = getattr(settings, 'PERF_INSTRUMENTATION_PREFIX', '/api/')
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+    
+    def start(self):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        # Connections opened before the receiver was connected
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection=connection)
+        return metrics, token
+    
+    def finish(self, request, response, metrics, token):
+        _current.reset(token)
+        if response.streaming:
+            # The body (and its queries) is produced after we return: record
+            # once it has been sent. No Server-Timing, headers are already out
+            response.streaming_content = self.stream(request, response, metrics)
+            return response
+        
+        metrics.wall = time.perf_counter() - metrics.started
+        response['Server-Timing'] = metrics.server_timing()
+        self.record(request, response, metrics)
+        return response
+    
+    def stream(self, request, response, metrics):
+        content = response.streaming_content
+        
+        if response.is_async:
+            async def chunks():
+                _current.set(metrics)
+                try:
+                    async for chunk in content:
+                        yield chunk
+                finally:
+                    _current.set(None)
+                    metrics.wall = time.perf_counter() - metrics.started
+                    self.record(request, response, metrics)
+            return chunks()
+        
+        def chunks():
+            _current.set(metrics)
+            try:
+                yield from content
+            finally:
+                _current.set(None)
+                metrics.wall = time.perf_counter() - metrics.started
+                self.record(request, response, metrics)
+        return chunks()
+    
+    def record(self, request, response, metrics):
+        match = getattr(request, 'resolver_match', None)
+        # Unresolved paths share one label so scanners cannot explode cardinality
+        route = (match.url_name if match else None) or 'unmatched'
+        record_request(route, request.method, response.status_code, metrics.wall)
+        
+        record = {
+            'route': route,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            **metrics.as_dict(),
+        }
+        logger.info(
+            f"{request.method} {request.path} {response.status_code} "
+            f"{record['wall_ms']}ms ({metrics.queries} queries)",
+            extra={'perf': record}
+        )
+        
+        budget = query_budget(route)
+        if metrics.queries > budget:
+            sql, count = metrics.repeated_statement()
+            logger.warning(
+                f"Query budget exceeded on {route}: {metrics.queries} > {budget}; "
+                f"most repeated ({count}x): {sql}",
+                extra={'perf': {**record, 'budget': budget, 'repeated_sql': sql, 'repeated': count}}
+            )
+    
+    def __call__(self, request):
+        if not request.path.startswith(self.prefix):
+            return self.get_response(request)
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        
+        metrics, token = self.start()
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            _current.reset(token)
+            raise
+        return self.finish(request, response, metrics, token)
+    
+    async def __acall__(self, request):
+        if not request.path.startswith(self.prefix):
+            return await self.get_response(request)
+        
+        metrics, token = self.start()
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            _current.reset(token)
+            raise
+        return self.finish(request, response, metrics, token)
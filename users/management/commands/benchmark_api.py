@@ -0,0 +1,294 @@
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection
+from urllib.parse import urlsplit
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+from django.test import override_settings
+from posts.models import Post
+from posts.seeding import seed_posts
+from users.models import User
+from users.seeding import seed_email, seed_users
+from users.serializers import CustomTokenObtainPairSerializer
+
+BENCH_PREFIX = 'bench'
+BENCH_PASSWORD = 'BenchPass123!'
+SCENARIOS = [
+    'login', 'refresh', 'post_list', 'post_detail', 'approval', 'admin_dashboard', 'editor_dashboard',
+]
+QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+class Client:
+    """One keep-alive HTTP connection per worker thread"""
+    
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.local = threading.local()
+    
+    def request(self, method, path, body=None, token=None):
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        payload = json.dumps(body) if body is not None else None
+        
+        for attempt in (1, 2):
+            connection = getattr(self.local, 'connection', None)
+            if connection is None:
+                connection = self.local.connection = HTTPConnection(self.host, self.port, timeout=60)
+            try:
+                started = time.perf_counter()
+                connection.request(method, path, body=payload, headers=headers)
+                response = connection.getresponse()
+                data = response.read()
+                elapsed = time.perf_counter() - started
+                break
+            except (ConnectionError, OSError):
+                # Server closed the keep-alive connection; reconnect once
+                connection.close()
+                self.local.connection = None
+                if attempt == 2:
+                    raise
+        
+        match = QUERIES_RE.search(response.getheader('Server-Timing', ''))
+        return response.status, data, elapsed, int(match.group(1)) if match else None
+
+class Command(BaseCommand):
+    """Management command to load test the API and track latency baselines"""
+    help = 'Seeds a dataset, drives the main endpoints concurrently and reports p50/p95/p99 latency'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200, help='Standard users to seed')
+        parser.add_argument('--editors', type=int, default=20, help='Editors to seed')
+        parser.add_argument('--admins', type=int, default=2, help='Admins to seed')
+        for status, default in (('approved', 5000), ('pending', 2000), ('rejected', 500), ('draft', 500)):
+            parser.add_argument(
+                f'--{status}', type=int, default=default, help=f'{status.title()} posts to seed',
+            )
+        parser.add_argument('--skip-seed', action='store_true', help='Reuse the existing dataset')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per scenario')
+        parser.add_argument('--concurrency', type=int, default=8, help='Concurrent client threads')
+        parser.add_argument(
+            '--scenarios', default=','.join(SCENARIOS),
+            help=f'Comma-separated subset of: {", ".join(SCENARIOS)}',
+        )
+        parser.add_argument(
+            '--url',
+            help='Benchmark an already running server (same database, THROTTLE_BUCKETS disabled) '
+                 'instead of an in-process one',
+        )
+        parser.add_argument('--save-baseline', help='Write results to this JSON file')
+        parser.add_argument('--baseline', help='Compare against this JSON file and fail on regressions')
+        parser.add_argument(
+            '--threshold', type=float, default=20.0,
+            help='Allowed p95 latency increase over the baseline, in percent',
+        )
+    
+    def handle(self, *args, **options):
+        scenarios = [name.strip() for name in options['scenarios'].split(',') if name.strip()]
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f'Unknown scenarios: {", ".join(sorted(unknown))}')
+        
+        if not options['skip_seed']:
+            self.seed(options)
+        
+        server = None
+        throttling = None
+        base_url = options['url']
+        if not base_url:
+            # One client address and account would only measure 429s; test throttling separately
+            throttling = override_settings(THROTTLE_BUCKETS={})
+            throttling.enable()
+            server = ThreadedWSGIServer(('127.0.0.1', 0), QuietRequestHandler, allow_reuse_address=False)
+            server.set_app(get_wsgi_application())
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            base_url = f'http://127.0.0.1:{server.server_port}'
+            self.stdout.write(f'Serving on {base_url}')
+        
+        try:
+            client = Client(base_url)
+            fixtures = self.prepare(client, options['concurrency'])
+            results = {}
+            for name in scenarios:
+                results[name] = self.run(client, name, fixtures, options['requests'], options['concurrency'])
+                self.report(name, results[name])
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+                throttling.disable()
+        
+        if options['save_baseline']:
+            with open(options['save_baseline'], 'w') as handle:
+                json.dump(results, handle, indent=2)
+            self.stdout.write(f"Saved baseline to {options['save_baseline']}")
+        
+        if options['baseline']:
+            self.compare(results, options['baseline'], options['threshold'])
+    
+    def seed(self, options):
+        progress = lambda done, total: self.stdout.write(f'  {done}/{total}')
+        for role, count in (('user', options['users']), ('editor', options['editors']), ('admin', options['admins'])):
+            created = seed_users(role, count, BENCH_PASSWORD, prefix=BENCH_PREFIX, progress=progress)
+            self.stdout.write(f'Seeded {created} {role}s')
+        
+        editor_ids = list(User.objects.filter(
+            email__startswith=f'{BENCH_PREFIX}-editor-'
+        ).values_list('id', flat=True))
+        if not editor_ids:
+            raise CommandError('At least one editor is needed to author posts')
+        
+        for status in ('approved', 'pending', 'rejected', 'draft'):
+            wanted = options[status]
+            have = Post.objects.filter(author_id__in=editor_ids, status=status).count()
+            if wanted > have:
+                seed_posts(wanted - have, editor_ids, seed=len(status) + have, status_weights={status: 1})
+                self.stdout.write(f'Seeded {wanted - have} {status} posts')
+        
+        # Bulk inserts skip signals: rebuild the counters they would maintain
+        call_command('rebuild_post_counters', stdout=self.stdout)
+    
+    def prepare(self, client, concurrency):
+        """Tokens for each role, refresh chains per worker and post ids to hit"""
+        def account(role):
+            user = User.objects.filter(email=seed_email(BENCH_PREFIX, role, 0)).first()
+            if user is None:
+                raise CommandError(f'No seeded {role}; run without --skip-seed first')
+            return user
+        
+        tokens = {}
+        for role in ('user', 'editor', 'admin'):
+            tokens[role] = str(CustomTokenObtainPairSerializer.get_token(account(role)).access_token)
+        
+        user = account('user')
+        refresh_chains = [str(CustomTokenObtainPairSerializer.get_token(user)) for _ in range(concurrency)]
+        
+        return {
+            'tokens': tokens,
+            'refresh': refresh_chains,
+            'approved': list(Post.objects.filter(status='approved').values_list('id', flat=True)[:1000]),
+            'pending': list(Post.objects.filter(status='pending').order_by('id').values_list('id', flat=True)),
+            'login_email': user.email,
+        }
+    
+    def run(self, client, name, fixtures, count, concurrency):
+        tokens = fixtures['tokens']
+        pending = iter(fixtures['pending'])
+        pending_lock = threading.Lock()
+        chains = fixtures['refresh']
+        
+        def call(index):
+            if name == 'login':
+                return client.request('POST', '/api/login/', {
+                    'email': fixtures['login_email'], 'password': BENCH_PASSWORD
+                })
+            if name == 'refresh':
+                # Rotation blacklists each token, so every worker follows its own chain
+                slot = index % len(chains)
+                status, data, elapsed, queries = client.request(
+                    'POST', '/api/token/refresh/', {'refresh': chains[slot]}
+                )
+                if status == 200:
+                    chains[slot] = json.loads(data)['refresh']
+                return status, data, elapsed, queries
+            if name == 'post_list':
+                return client.request('GET', '/api/posts/', token=tokens['user'])
+            if name == 'post_detail':
+                post_id = fixtures['approved'][index % len(fixtures['approved'])]
+                return client.request('GET', f'/api/posts/{post_id}/', token=tokens['user'])
+            if name == 'approval':
+                with pending_lock:
+                    post_id = next(pending, None)
+                if post_id is None:
+                    return None
+                return client.request(
+                    'PATCH', f'/api/admin/posts/{post_id}/approve/', {'action': 'approve'}, token=tokens['admin']
+                )
+            if name == 'admin_dashboard':
+                return client.request('GET', '/api/admin/dashboard/', token=tokens['admin'])
+            return client.request('GET', '/api/editor/dashboard/', token=tokens['editor'])
+        
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            # Refresh chains are sequential per slot, so hand each worker its own slots
+            if name == 'refresh':
+                samples = list(executor.map(
+                    lambda slot: [call(slot) for _ in range(slot, count, len(chains))],
+                    range(len(chains))
+                ))
+                samples = [sample for chain in samples for sample in chain]
+            else:
+                samples = list(executor.map(call, range(count)))
+        duration = time.perf_counter() - started
+        
+        samples = [sample for sample in samples if sample is not None]
+        latencies = sorted(elapsed for _, _, elapsed, _ in samples)
+        queries = [count for _, _, _, count in samples if count is not None]
+        return {
+            'requests': len(samples),
+            'errors': sum(1 for status, _, _, _ in samples if status >= 400),
+            'throughput': round(len(samples) / duration, 2) if duration else 0.0,
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+            'queries_per_request': round(sum(queries) / len(queries), 2) if queries else None,
+        }
+    
+    def report(self, name, result):
+        line = (
+            f"{name:>17}: {result['requests']:>5} req  {result['throughput']:>8.1f} req/s  "
+            f"p50 {result['p50_ms']:>7.1f}ms  p95 {result['p95_ms']:>7.1f}ms  p99 {result['p99_ms']:>7.1f}ms  "
+            f"queries/req {result['queries_per_request']}"
+        )
+        if result['errors']:
+            self.stdout.write(self.style.WARNING(f"{line}  errors {result['errors']}"))
+        else:
+            self.stdout.write(line)
+    
+    def compare(self, results, path, threshold):
+        try:
+            with open(path) as handle:
+                baseline = json.load(handle)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f'Could not read baseline {path}: {exc}')
+        
+        regressions = []
+        for name, result in results.items():
+            previous = baseline.get(name)
+            if not previous:
+                continue
+            if previous['p95_ms'] and result['p95_ms'] > previous['p95_ms'] * (1 + threshold / 100):
+                regressions.append(
+                    f"{name}: p95 {previous['p95_ms']}ms -> {result['p95_ms']}ms (> {threshold:g}%)"
+                )
+            if result['errors'] > previous.get('errors', 0):
+                regressions.append(f"{name}: errors {previous.get('errors', 0)} -> {result['errors']}")
+            # Query counts are deterministic, so any increase is a regression
+            if (previous.get('queries_per_request') is not None and result['queries_per_request'] is not None
+                    and result['queries_per_request'] > previous['queries_per_request'] + 0.5):
+                regressions.append(
+                    f"{name}: queries/request {previous['queries_per_request']} -> {result['queries_per_request']}"
+                )
+        
+        if regressions:
+            for regression in regressions:
+                self.stdout.write(self.style.ERROR(regression))
+            raise CommandError(f'{len(regressions)} regression(s) against {path}')
+        self.stdout.write(self.style.SUCCESS(f'No regressions against {path}'))
@@ -0,0 +1,116 @@
+import time
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.views import TokenRefreshView
+from users.revocation import revoked_jtis
+from users.serializers import CustomTokenObtainPairSerializer
+
+User = get_user_model()
+
+BENCH_JTI_PREFIX = 'bench-'
+
+class Command(BaseCommand):
+    """Management command to benchmark token refresh with and without the revoked jti filter"""
+    help = 'Measures TokenRefreshView throughput against a large token blacklist'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--blacklisted',
+            type=int,
+            default=1_000_000,
+            help='Number of blacklisted tokens to seed before measuring',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=500,
+            help='Number of refresh requests per run',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Rows inserted per bulk_create batch while seeding',
+        )
+        parser.add_argument(
+            '--cleanup',
+            action='store_true',
+            help='Delete the seeded benchmark tokens afterwards',
+        )
+
+    def handle(self, *args, **options):
+        user, _ = User.objects.get_or_create(
+            email='bench-refresh@example.com',
+            defaults={'full_name': 'Benchmark User'}
+        )
+
+        self.seed(user, options['blacklisted'], options['batch_size'])
+
+        results = {}
+        for enabled in (False, True):
+            with override_settings(REVOKED_JTI_FILTER_ENABLED=enabled):
+                revoked_jtis.reset()
+                if enabled:
+                    # Building the filter is a one-off per process, keep it out of the timing
+                    started = time.perf_counter()
+                    revoked_jtis.rebuild()
+                    self.stdout.write(f'Filter built in {time.perf_counter() - started:.2f}s')
+                results[enabled] = self.run(user, options['requests'])
+
+        for enabled, rate in results.items():
+            label = 'with filter' if enabled else 'without filter'
+            self.stdout.write(f'{label:>15}: {rate:,.1f} refreshes/s')
+        self.stdout.write(self.style.SUCCESS(
+            f'Speedup: {results[True] / results[False]:.2f}x'
+        ))
+
+        if options['cleanup']:
+            OutstandingToken.objects.filter(jti__startswith=BENCH_JTI_PREFIX).delete()
+            self.stdout.write(self.style.WARNING('Deleted seeded benchmark tokens'))
+
+    def seed(self, user, total, batch_size):
+        existing = OutstandingToken.objects.filter(jti__startswith=BENCH_JTI_PREFIX).count()
+        if existing >= total:
+            self.stdout.write(f'Reusing {existing} seeded blacklisted tokens')
+            return
+
+        expires_at = timezone.now() + timedelta(days=7)
+        created = existing
+        while created < total:
+            size = min(batch_size, total - created)
+            with transaction.atomic():
+                tokens = OutstandingToken.objects.bulk_create([
+                    OutstandingToken(
+                        user=user,
+                        jti=f'{BENCH_JTI_PREFIX}{uuid.uuid4().hex}',
+                        token='',
+                        created_at=timezone.now(),
+                        expires_at=expires_at,
+                    )
+                    for _ in range(size)
+                ])
+                BlacklistedToken.objects.bulk_create([
+                    BlacklistedToken(token=token) for token in tokens
+                ])
+            created += size
+            self.stdout.write(f'Seeded {created}/{total} blacklisted tokens...')
+
+    def run(self, user, count):
+        view = TokenRefreshView.as_view()
+        factory = APIRequestFactory()
+        refresh = str(CustomTokenObtainPairSerializer.get_token(user))
+
+        started = time.perf_counter()
+        for _ in range(count):
+            response = view(factory.post('/api/token/refresh/', {'refresh': refresh}, format='json'))
+            # Rotation blacklists the old token, so continue with the new one
+            refresh = response.data['refresh']
+        return count / (time.perf_counter() - started)
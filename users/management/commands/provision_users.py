@@ -0,0 +1,62 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from users.provisioning import parse_rows, provision_users
+
+class Command(BaseCommand):
+    """Management command to bulk create users from a CSV or JSON file"""
+    help = 'Creates users from a CSV (email,full_name,password,role) or JSON file'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSON file with one user per row')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Rows inserted per bulk_create batch (default USER_PROVISIONING_BATCH_SIZE)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Password hashing processes (default USER_PROVISIONING_WORKERS)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate rows without creating anything',
+        )
+        parser.add_argument(
+            '--report',
+            help='Write per-row results to this JSON file',
+        )
+    
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], encoding='utf-8-sig') as handle:
+                rows = parse_rows(handle.read(), options['path'])
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Could not read {options['path']}: {exc}")
+        
+        results = provision_users(
+            rows,
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            dry_run=options['dry_run'],
+        )
+        
+        for result in results:
+            if result['status'] == 'invalid':
+                self.stdout.write(self.style.ERROR(
+                    f"Row {result['row']} ({result['email']}): {json.dumps(result['errors'])}"
+                ))
+        
+        if options['report']:
+            with open(options['report'], 'w') as handle:
+                json.dump(results, handle, indent=2)
+        
+        rejected = sum(1 for result in results if result['status'] == 'invalid')
+        verb = 'Validated' if options['dry_run'] else 'Created'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {len(results) - rejected} users, rejected {rejected}'
+        ))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+class Command(BaseCommand):
+    """Management command to prune expired token blacklist rows"""
+    help = 'Deletes expired outstanding and blacklisted tokens in batches'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Number of outstanding tokens deleted per batch',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many rows would be deleted',
+        )
+    
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        expired = OutstandingToken.objects.filter(expires_at__lte=timezone.now())
+        
+        if options['dry_run']:
+            self.stdout.write(f'{expired.count()} expired tokens would be deleted')
+            return
+        
+        total = 0
+        while True:
+            ids = list(expired.order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            
+            # Blacklist rows first so the outstanding delete has nothing to cascade
+            BlacklistedToken.objects.filter(token_id__in=ids).delete()
+            OutstandingToken.objects.filter(pk__in=ids).delete()
+            total += len(ids)
+            self.stdout.write(f'Deleted {total} expired tokens...')
+        
+        self.stdout.write(self.style.SUCCESS(f'Pruned {total} expired tokens'))
@@ -0,0 +1,80 @@
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from posts.models import Post
+from posts.seeding import STATUS_WEIGHTS, seed_posts
+from users.models import User
+from users.seeding import seed_users
+
+class Command(BaseCommand):
+    """Management command to generate production-scale users and posts"""
+    help = 'Bulk seeds users per role and posts with realistic status and timestamp distributions'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1_000_000, help='Standard users to have')
+        parser.add_argument('--editors', type=int, default=10_000, help='Editors to have')
+        parser.add_argument('--admins', type=int, default=50, help='Admins to have')
+        parser.add_argument('--posts', type=int, default=2_000_000, help='Seeded posts to have in total')
+        parser.add_argument('--days', type=int, default=730, help='Time span covered by the timestamps')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for reproducible datasets')
+        parser.add_argument('--prefix', default='seed', help='Email prefix of seeded accounts')
+        parser.add_argument('--password', default='SeedPass123!', help='Password shared by every seeded account')
+        parser.add_argument('--batch-size', type=int, default=20000, help='Rows per bulk_create batch')
+        parser.add_argument(
+            '--skip-search-index', action='store_true',
+            help='Do not rebuild the full-text search index afterwards',
+        )
+    
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        # One PBKDF2 run for the whole dataset instead of one per account
+        password_hash = make_password(options['password'])
+        
+        for role in ('admin', 'editor', 'user'):
+            wanted = options[f'{role}s']
+            created = seed_users(
+                role, wanted, options['password'],
+                prefix=options['prefix'],
+                batch_size=options['batch_size'],
+                seed=options['seed'],
+                days=options['days'],
+                password_hash=password_hash,
+                progress=self.progress(f'{role}s', started),
+            )
+            self.stdout.write(self.style.SUCCESS(f'Seeded {created} {role}s ({wanted} wanted)'))
+        
+        authors = list(User.objects.filter(
+            email__startswith=f"{options['prefix']}-editor-"
+        ).order_by('id').values_list('id', flat=True))
+        existing = Post.objects.filter(author_id__in=authors).count() if authors else 0
+        missing = options['posts'] - existing
+        if missing > 0:
+            if not authors:
+                raise CommandError('Posts need at least one seeded editor (--editors)')
+            seed_posts(
+                missing, authors,
+                batch_size=options['batch_size'],
+                # Offset by what exists so a top-up does not replay the first run
+                seed=options['seed'] + existing,
+                days=options['days'],
+                status_weights=STATUS_WEIGHTS,
+                # Zipf-like: a few prolific authors, a long tail of occasional ones
+                author_weights=[1 / rank for rank in range(1, len(authors) + 1)],
+                progress=self.progress('posts', started),
+            )
+            self.stdout.write(self.style.SUCCESS(f'Seeded {missing} posts'))
+        
+        # Bulk inserts skip signals: rebuild what they would have maintained
+        call_command('rebuild_post_counters', stdout=self.stdout)
+        if not options['skip_search_index']:
+            call_command('rebuild_search_index', batch_size=options['batch_size'], stdout=self.stdout)
+        
+        self.stdout.write(self.style.SUCCESS(f'Done in {time.perf_counter() - started:.1f}s'))
+    
+    def progress(self, label, started):
+        def report(done, total):
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f'{label}: {done}/{total} ({elapsed:.1f}s)')
+        return report
@@ -0,0 +1,208 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS = {
+    'http_requests_total': ('counter', 'API requests by URL name, method and status'),
+    'http_request_duration_seconds': ('histogram', 'API request wall time by URL name'),
+    'jwt_auth_failures_total': ('counter', 'Rejected JWTs by reason (expired, invalid)'),
+    'auth_logins_total': ('counter', 'Token obtain attempts by outcome'),
+    'auth_token_refreshes_total': ('counter', 'Token refresh attempts by outcome'),
+    'throttled_requests_total': ('counter', 'Requests refused by a login/registration bucket, by scope and bucket'),
+    'cache_requests_total': ('counter', 'Cache lookups by cache and result (hit, miss)'),
+    'cache_hit_ratio': ('gauge', 'Hits / lookups per cache since start'),
+}
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+class MetricsRegistry:
+    """Counters and histograms kept in per-thread shards.
+    
+    Each thread only ever writes its own shard, so recording takes no lock;
+    a scrape sums the shards. With ``METRICS_MULTIPROCESS_DIR`` set, every
+    process also dumps its totals to ``metrics-<pid>.json`` there at most
+    every ``METRICS_FLUSH_INTERVAL`` seconds, and a scrape in any worker
+    adds up all the files.
+    """
+    
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.shards = []
+        self.local = threading.local()
+        self.collectors = []
+        self.flush_lock = threading.Lock()
+        self.last_flush = 0.0
+    
+    def shard(self):
+        shard = getattr(self.local, 'shard', None)
+        if shard is None:
+            shard = self.local.shard = {'counters': {}, 'histograms': {}}
+            # list.append is atomic; a thread registers its shard once
+            self.shards.append(shard)
+        return shard
+    
+    def inc(self, name, amount=1, **labels):
+        counters = self.shard()['counters']
+        key = _key(name, labels)
+        counters[key] = counters.get(key, 0) + amount
+        self.maybe_flush()
+    
+    def observe(self, name, value, **labels):
+        histograms = self.shard()['histograms']
+        key = _key(name, labels)
+        entry = histograms.get(key)
+        if entry is None:
+            entry = histograms[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+        self.maybe_flush()
+    
+    def register_collector(self, collector):
+        """``collector()`` yields ``(name, labels, value)`` counters at scrape time"""
+        self.collectors.append(collector)
+    
+    def snapshot(self):
+        """This process's totals as JSON-friendly lists"""
+        counters, histograms = {}, {}
+        for shard in list(self.shards):
+            for key, value in dict(shard['counters']).items():
+                counters[key] = counters.get(key, 0) + value
+            for key, (buckets, total, count) in dict(shard['histograms']).items():
+                merged = histograms.setdefault(key, [[0] * len(buckets), 0.0, 0])
+                merged[0] = [a + b for a, b in zip(merged[0], buckets)]
+                merged[1] += total
+                merged[2] += count
+        
+        for collector in self.collectors:
+            for name, labels, value in collector():
+                key = _key(name, labels)
+                counters[key] = counters.get(key, 0) + value
+        
+        return {
+            'counters': [[name, list(labels), value] for (name, labels), value in counters.items()],
+            'histograms': [[name, list(labels), *entry] for (name, labels), entry in histograms.items()],
+        }
+    
+    def maybe_flush(self):
+        directory = getattr(settings, 'METRICS_MULTIPROCESS_DIR', None)
+        if not directory or time.monotonic() - self.last_flush < getattr(settings, 'METRICS_FLUSH_INTERVAL', 5):
+            return
+        # Whoever holds the lock is already flushing; never wait for it
+        if self.flush_lock.acquire(blocking=False):
+            try:
+                self.flush(directory)
+            finally:
+                self.flush_lock.release()
+    
+    def flush(self, directory):
+        self.last_flush = time.monotonic()
+        path = os.path.join(directory, f'metrics-{os.getpid()}.json')
+        with open(f'{path}.tmp', 'w') as handle:
+            json.dump(self.snapshot(), handle)
+        os.replace(f'{path}.tmp', path)
+    
+    def collect(self):
+        """Snapshots to report: this process, or every worker's file"""
+        directory = getattr(settings, 'METRICS_MULTIPROCESS_DIR', None)
+        if not directory:
+            return [self.snapshot()]
+        
+        with self.flush_lock:
+            self.flush(directory)
+        snapshots = []
+        for filename in os.listdir(directory):
+            if filename.startswith('metrics-') and filename.endswith('.json'):
+                try:
+                    with open(os.path.join(directory, filename)) as handle:
+                        snapshots.append(json.load(handle))
+                except (OSError, ValueError):
+                    # Mid-replace or removed; it is picked up next scrape
+                    continue
+        return snapshots
+    
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        counters, histograms = {}, {}
+        for snapshot in self.collect():
+            for name, labels, value in snapshot['counters']:
+                key = (name, tuple(map(tuple, labels)))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, buckets, total, count in snapshot['histograms']:
+                key = (name, tuple(map(tuple, labels)))
+                merged = histograms.setdefault(key, [[0] * len(buckets), 0.0, 0])
+                merged[0] = [a + b for a, b in zip(merged[0], buckets)]
+                merged[1] += total
+                merged[2] += count
+        
+        gauges = {}
+        for (name, labels), value in counters.items():
+            if name == 'cache_requests_total':
+                cache = dict(labels)['cache']
+                hits, lookups = gauges.get(cache, (0, 0))
+                hits += value if dict(labels)['result'] == 'hit' else 0
+                gauges[cache] = (hits, lookups + value)
+        
+        lines = []
+        for name, (kind, text) in METRICS.items():
+            lines += [f'# HELP {name} {text}', f'# TYPE {name} {kind}']
+            if kind == 'counter':
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f'{name}{format_labels(labels)} {value}')
+            elif kind == 'histogram':
+                for (metric, labels), (buckets, total, count) in sorted(histograms.items()):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, bucket in zip(self.buckets + ('+Inf',), buckets):
+                        cumulative += bucket
+                        lines.append(f'{name}_bucket{format_labels(labels + (("le", str(bound)),))} {cumulative}')
+                    lines.append(f'{name}_sum{format_labels(labels)} {total}')
+                    lines.append(f'{name}_count{format_labels(labels)} {count}')
+            elif name == 'cache_hit_ratio':
+                for cache, (hits, lookups) in sorted(gauges.items()):
+                    ratio = hits / lookups if lookups else 0.0
+                    lines.append(f'{name}{format_labels((("cache", cache),))} {ratio:.4f}')
+        return '\n'.join(lines) + '\n'
+
+def escape_label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{escape_label_value(value)}"' for key, value in labels) + '}'
+
+registry = MetricsRegistry()
+
+AUTH_ROUTES = {
+    'token_obtain_pair': 'auth_logins_total',
+    'token_refresh': 'auth_token_refreshes_total',
+}
+
+def record_request(route, method, status, seconds):
+    """Called by PerformanceMiddleware once per API request"""
+    registry.inc('http_requests_total', route=route, method=method, status=str(status))
+    registry.observe('http_request_duration_seconds', seconds, route=route)
+    if route in AUTH_ROUTES and method == 'POST':
+        registry.inc(AUTH_ROUTES[route], outcome='success' if status < 400 else 'failure')
+
+def record_cache_lookup(cache, hit):
+    registry.inc('cache_requests_total', cache=cache, result='hit' if hit else 'miss')
+
+def verified_token_collector():
+    from .token_cache import verified_tokens
+    
+    stats = verified_tokens.stats()
+    yield 'cache_requests_total', {'cache': 'verified_tokens', 'result': 'hit'}, stats['hits']
+    yield 'cache_requests_total', {'cache': 'verified_tokens', 'result': 'miss'}, stats['misses']
+
+registry.register_collector(verified_token_collector)
@@ -45,6 +45,7 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
     date_joined = models.DateTimeField(default=timezone.now)
+    token_version = models.PositiveIntegerField(default=0)
     
     objects = UserManager()
     
@@ -63,7 +64,19 @@ class User(AbstractBaseUser, PermissionsMixin):
     def is_standard_user(self):
         return self.role == 'user'
     
+    def revoke_tokens(self):
+        """Invalidate every access and refresh token issued to this user"""
+        from .revocation import forget_token_version
+        
+        User.objects.filter(pk=self.pk).update(token_version=models.F('token_version') + 1)
+        self.refresh_from_db(fields=['token_version'])
+        forget_token_version(self.pk)
+    
     class Meta:
         db_table = 'users'
         verbose_name = 'User'
+        indexes = [
+            # Keyset pagination of the admin user listing
+            models.Index(fields=['-date_joined', '-id'], name='users_date_joined_idx'),
+        ]
         verbose_name_plural = 'Users'
\ No newline at end of file
@@ -0,0 +1,160 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.db.models import Q
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+class KeysetPagination(pagination.BasePagination):
+    """Cursor pagination that seeks on an ``(ordering_field, id)`` keyset.
+    
+    Every page is a ``WHERE (field, id) < (last_field, last_id) ORDER BY
+    field DESC, id DESC LIMIT n`` query, so deep pages cost the same as the
+    first one. The total ``count`` is only computed when the client asks
+    for it with ``?count=true``. Pages only link forward.
+    """
+    
+    ordering_field = None
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Invalid cursor'
+    
+    def get_ordering(self):
+        return (f'-{self.ordering_field}', '-id')
+    
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+    
+    def encode_cursor(self, obj):
+        value = getattr(obj, self.ordering_field)
+        # Full isoformat: DjangoJSONEncoder would truncate to milliseconds
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        raw = json.dumps([value, obj.pk]).encode()
+        return urlsafe_b64encode(raw).decode().rstrip('=')
+    
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        
+        try:
+            raw = urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4))
+            value, pk = json.loads(raw)
+            value = model._meta.get_field(self.ordering_field).to_python(value)
+            pk = model._meta.pk.to_python(pk)
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+        
+        if value is None:
+            raise NotFound(self.invalid_cursor_message)
+        return value, pk
+    
+    def start_page(self, request):
+        """Record the request and page size; return whether a count was asked for"""
+        self.request = request
+        self.page_size_value = self.get_page_size(request)
+        self.count = None
+        return request.query_params.get(self.count_query_param, '').lower() in ('1', 'true', 'yes')
+    
+    def seek(self, queryset):
+        """Order ``queryset`` and skip past the cursor position"""
+        queryset = queryset.order_by(*self.get_ordering())
+        position = self.decode_cursor(self.request, queryset.model)
+        if position is not None:
+            value, pk = position
+            field = self.ordering_field
+            # The leading <= bounds one index range scan; an OR of two ranges
+            # is often planned as a full scan plus sort
+            queryset = queryset.filter(
+                Q(**{f'{field}__lte': value}) & (Q(**{f'{field}__lt': value}) | Q(pk__lt=pk))
+            )
+        # Fetch one extra row to learn whether there is a next page
+        return queryset[:self.page_size_value + 1]
+    
+    def finish_page(self, rows):
+        self.has_next = len(rows) > self.page_size_value
+        rows = rows[:self.page_size_value]
+        self.next_cursor = self.encode_cursor(rows[-1]) if self.has_next else None
+        return rows
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.start_page(request):
+            self.count = queryset.order_by().count()
+        return self.finish_page(list(self.seek(queryset)))
+    
+    async def apaginate_queryset(self, queryset, request):
+        """Async ORM version of ``paginate_queryset`` for coroutine views"""
+        if self.start_page(request):
+            self.count = await queryset.order_by().acount()
+        return self.finish_page([row async for row in self.seek(queryset)])
+    
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+    
+    def get_paginated_payload(self, data):
+        payload = {'next': self.get_next_link()}
+        if self.count is not None:
+            payload['count'] = self.count
+        payload['results'] = data
+        return payload
+    
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_payload(data))
+    
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'count': {'type': 'integer', 'description': 'Only present with ?count=true'},
+                'results': schema,
+            },
+        }
+    
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Opaque cursor taken from the previous page',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Number of results per page',
+                'schema': {'type': 'integer'},
+            },
+            {
+                'name': self.count_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Set to true to include the total count',
+                'schema': {'type': 'boolean'},
+            },
+        ]
+
+class PostCursorPagination(KeysetPagination):
+    """Keyset pagination on (created_at, id) for post listings"""
+    ordering_field = 'created_at'
+
+class UserCursorPagination(KeysetPagination):
+    """Keyset pagination on (date_joined, id) for user listings"""
+    ordering_field = 'date_joined'
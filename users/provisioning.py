@@ -0,0 +1,136 @@
+import csv
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+from .models import User
+from .serializers import AdminUserCreateSerializer
+from .signals import users_provisioned
+
+class BulkUserRowSerializer(AdminUserCreateSerializer):
+    """Validates one provisioning row; email uniqueness is checked per batch"""
+    
+    email = serializers.EmailField(max_length=254)
+    
+    def validate_email(self, value):
+        return User.objects.normalize_email(value)
+
+def parse_rows(content, filename=''):
+    """Read user rows from CSV or JSON text (a list, or ``{"users": [...]}``)"""
+    if filename.lower().endswith('.csv') or not content.lstrip().startswith(('[', '{')):
+        return [dict(row) for row in csv.DictReader(io.StringIO(content))]
+    
+    data = json.loads(content)
+    if isinstance(data, dict):
+        data = data.get('users', [])
+    if not isinstance(data, list):
+        raise ValueError('Expected a list of users')
+    return data
+
+def _init_worker():
+    # Spawned workers start without Django configured
+    django.setup()
+
+def hash_passwords(passwords, workers=None):
+    """Hash passwords in a process pool, or inline when one worker is requested.
+    
+    Meant for the management command; web requests hash inline rather than
+    forking a pool of CPU-count processes per request.
+    """
+    if workers is None:
+        workers = getattr(settings, 'USER_PROVISIONING_WORKERS', None) or os.cpu_count() or 1
+    workers = min(workers, len(passwords))
+    if workers <= 1:
+        return [make_password(password) for password in passwords]
+    
+    chunksize = max(1, len(passwords) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        return list(executor.map(make_password, passwords, chunksize=chunksize))
+
+def provision_users(rows, batch_size=None, workers=None, dry_run=False, sender=None):
+    """Validate, hash and bulk insert ``rows``; return one result per row.
+    
+    Every row is validated before anything is written. Invalid rows and
+    emails that already exist (or repeat within the upload) are reported and
+    skipped, the rest are inserted with ``bulk_create``. ``bulk_create``
+    bypasses ``post_save``, so ``users_provisioned`` fires once per batch.
+    """
+    batch_size = batch_size or getattr(settings, 'USER_PROVISIONING_BATCH_SIZE', 500)
+    results = [{'row': index, 'email': row.get('email') if isinstance(row, dict) else None}
+               for index, row in enumerate(rows, start=1)]
+    
+    valid = []
+    for result, row in zip(results, rows):
+        serializer = BulkUserRowSerializer(data=row)
+        if serializer.is_valid():
+            result['email'] = serializer.validated_data['email']
+            valid.append((result, serializer.validated_data))
+        else:
+            result.update(status='invalid', errors=serializer.errors)
+    
+    existing = set()
+    emails = [data['email'] for _, data in valid]
+    for start in range(0, len(emails), batch_size):
+        existing.update(User.objects.filter(
+            email__in=emails[start:start + batch_size]
+        ).values_list('email', flat=True))
+    
+    pending = []
+    for result, data in valid:
+        if data['email'] in existing:
+            result.update(status='invalid', errors={'email': ['user with this email already exists.']})
+        else:
+            existing.add(data['email'])
+            pending.append((result, data))
+    
+    if dry_run:
+        for result, _ in pending:
+            result['status'] = 'valid'
+        return results
+    
+    hashed = hash_passwords([data['password'] for _, data in pending], workers=workers)
+    
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        users = [
+            User(
+                email=data['email'],
+                full_name=data['full_name'],
+                role=data.get('role', 'user'),
+                password=password,
+            )
+            for (_, data), password in zip(batch, hashed[start:start + batch_size])
+        ]
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create(users)
+            created = list(zip(batch, users))
+        except IntegrityError:
+            # An email was taken after the uniqueness pre-check (a concurrent
+            # upload or signup); insert this batch row by row to find it
+            created = _insert_one_by_one(batch, users)
+        
+        if created:
+            users_provisioned.send(sender=sender or User, users=[user for _, user in created])
+        for (result, _), user in created:
+            result.update(status='created', id=user.pk)
+    
+    return results
+
+def _insert_one_by_one(batch, users):
+    created = []
+    for (result, data), user in zip(batch, users):
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create([user])
+        except IntegrityError:
+            result.update(status='invalid', errors={'email': ['user with this email already exists.']})
+        else:
+            created.append(((result, data), user))
+    return created
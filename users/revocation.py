@@ -0,0 +1,272 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection, transaction
+
+User = get_user_model()
+
+logger = logging.getLogger(__name__)
+
+TOKEN_VERSION_CLAIM = 'token_version'
+
+_versions = {}
+_lock = threading.Lock()
+
+def _cache_ttl():
+    return getattr(settings, 'TOKEN_VERSION_CACHE_TTL', 30)
+
+def _cache_size():
+    return getattr(settings, 'TOKEN_VERSION_CACHE_SIZE', 10000)
+
+def get_token_version(user_id):
+    """Return the current token version for a user, or None if the user is gone.
+
+    Versions are cached in-process for ``TOKEN_VERSION_CACHE_TTL`` seconds, so
+    a revocation made in another process takes at most that long to apply here.
+    """
+    now = time.monotonic()
+    entry = _versions.get(user_id)
+    if entry is not None and entry[1] > now:
+        return entry[0]
+    
+    version = User.objects.filter(
+        pk=user_id, is_active=True
+    ).values_list('token_version', flat=True).first()
+    remember_token_version(user_id, version)
+    return version
+
+def remember_token_version(user_id, version):
+    """Store a known token version in the in-process cache"""
+    with _lock:
+        if len(_versions) >= _cache_size():
+            _versions.clear()
+        _versions[user_id] = (version, time.monotonic() + _cache_ttl())
+
+def forget_token_version(user_id):
+    """Drop a cached token version so the next check reads the database"""
+    with _lock:
+        _versions.pop(user_id, None)
+
+def clear_token_versions():
+    with _lock:
+        _versions.clear()
+
+def is_token_current(payload, current_version):
+    """Check a token payload against a user's current token version"""
+    if current_version is None:
+        return False
+    return payload.get(TOKEN_VERSION_CLAIM, 0) == current_version
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings.
+
+    Answers "definitely not present" or "possibly present" with a false
+    positive rate of about ``error_rate`` while holding up to ``capacity``
+    items.
+    """
+    
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+        self._lock = threading.Lock()
+    
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+    
+    def add(self, item):
+        with self._lock:
+            for position in self._positions(item):
+                self.bits[position >> 3] |= 1 << (position & 7)
+            self.count += 1
+    
+    def __contains__(self, item):
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+def _blacklisted_jtis(**filters):
+    from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+    
+    return BlacklistedToken.objects.filter(**filters).order_by('id').values_list('id', 'token__jti')
+
+# Bumped in the shared cache whenever a token is blacklisted
+REVOCATION_VERSION_KEY = 'revoked_jtis:version'
+
+def _version_cache():
+    return caches[getattr(settings, 'REVOKED_JTI_FILTER_CACHE_ALIAS', 'default')]
+
+def announce_revocation(on_bumped=None):
+    """Tell every worker's filter to sync once the blacklist row is committed"""
+    def bump():
+        cache = _version_cache()
+        try:
+            version = cache.incr(REVOCATION_VERSION_KEY)
+        except ValueError:
+            version = 1
+            cache.set(REVOCATION_VERSION_KEY, version, timeout=None)
+        if on_bumped:
+            on_bumped(version)
+    transaction.on_commit(bump)
+
+# Ids below the newest seen row that are tracked as possibly still committing
+MAX_TRACKED_GAPS = 1000
+
+class _FilterState:
+    """A Bloom filter plus the blacklist rows it is known to be complete for.
+    
+    It holds every row with ``id <= last_id`` except the ids in ``gaps``:
+    ids skipped over because their transaction had not committed yet (ids
+    can commit out of order) or was rolled back. Gaps are re-checked on
+    every sync and given up after ``REVOKED_JTI_FILTER_GAP_SECONDS``.
+    """
+    
+    def __init__(self, capacity, error_rate):
+        self.bloom = BloomFilter(capacity, error_rate)
+        self.last_id = 0
+        self.gaps = {}
+    
+    def apply(self, rows, now):
+        for row_id, jti in rows:
+            if row_id > self.last_id:
+                # Ids before the very first row are pruned rows, not pending ones
+                start = max(self.last_id, row_id - MAX_TRACKED_GAPS) if self.last_id else row_id - 1
+                for missing in range(start + 1, row_id):
+                    self.gaps[missing] = now
+                self.last_id = row_id
+            elif self.gaps.pop(row_id, None) is None:
+                # Already applied by a concurrent sync
+                continue
+            self.bloom.add(jti)
+    
+    def expire_gaps(self, now):
+        horizon = now - getattr(settings, 'REVOKED_JTI_FILTER_GAP_SECONDS', 60)
+        self.gaps = {row_id: seen for row_id, seen in self.gaps.items() if seen > horizon}
+
+class RevokedJtiFilter:
+    """Per-process filter of blacklisted refresh token jtis.
+    
+    A negative answer means the blacklist table does not have to be queried,
+    so a check that misses the filter costs no database round-trip. The
+    filter catches up on rows added since its last sync (a primary key range
+    probe at the tail of the table, plus any tracked gaps) when the
+    revocation version in ``REVOKED_JTI_FILTER_CACHE_ALIAS`` changes, or at
+    the latest every ``REVOKED_JTI_FILTER_SYNC_INTERVAL`` seconds; with a
+    cache shared by all workers a token rotated in another worker is seen on
+    the next check. The filter is built, grown and rebuilt every
+    ``REVOKED_JTI_FILTER_REBUILD_INTERVAL`` seconds in a background thread;
+    until the first build finishes every check goes to the table.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        with self._lock:
+            self._state = None
+            self._capacity = getattr(settings, 'REVOKED_JTI_FILTER_CAPACITY', 1_000_000)
+            self._build_due = 0.0
+            self._building = False
+            self._synced_version = None
+            self._sync_due = 0.0
+    
+    def rebuild(self):
+        """Build a fresh filter from the blacklist table and swap it in"""
+        version = _version_cache().get(REVOCATION_VERSION_KEY, 0)
+        state = _FilterState(self._capacity, getattr(settings, 'REVOKED_JTI_FILTER_ERROR_RATE', 0.01))
+        state.apply(_blacklisted_jtis().iterator(chunk_size=10000), time.monotonic())
+        with self._lock:
+            self._state = state
+            self._build_due = time.monotonic() + getattr(settings, 'REVOKED_JTI_FILTER_REBUILD_INTERVAL', 3600)
+            self._synced_version = version
+            self._sync_due = time.monotonic() + getattr(settings, 'REVOKED_JTI_FILTER_SYNC_INTERVAL', 1)
+    
+    def _rebuild_in_background(self):
+        try:
+            self.rebuild()
+        except Exception:
+            logger.exception('Rebuilding the revoked jti filter failed')
+            with self._lock:
+                self._build_due = time.monotonic() + 30
+        finally:
+            with self._lock:
+                self._building = False
+            connection.close()
+    
+    def _schedule_rebuild(self):
+        with self._lock:
+            if self._building:
+                return
+            self._building = True
+            # Retry later rather than on every request if the build fails
+            self._build_due = time.monotonic() + 30
+        threading.Thread(target=self._rebuild_in_background, name='revoked-jti-filter', daemon=True).start()
+    
+    def sync(self, state=None, version=None):
+        """Apply blacklist rows added since the filter last looked"""
+        state = state or self._state
+        if state is None:
+            return
+        if version is None:
+            version = _version_cache().get(REVOCATION_VERSION_KEY, 0)
+        with self._lock:
+            last_id, gaps = state.last_id, list(state.gaps)
+        
+        rows = list(_blacklisted_jtis(id__gt=last_id))
+        if gaps:
+            rows += _blacklisted_jtis(id__in=gaps)
+        
+        now = time.monotonic()
+        with self._lock:
+            state.apply(sorted(rows), now)
+            state.expire_gaps(now)
+            if state is self._state:
+                self._synced_version = version
+                self._sync_due = now + getattr(settings, 'REVOKED_JTI_FILTER_SYNC_INTERVAL', 1)
+            if state.bloom.count >= state.bloom.capacity:
+                # Keep serving the crowded filter (more false positives, never
+                # false negatives) while a larger one is built
+                self._capacity = state.bloom.capacity * 2
+                self._build_due = 0.0
+    
+    def add(self, jti):
+        """Record a jti blacklisted by this process and tell the other workers"""
+        with self._lock:
+            if self._state is not None:
+                self._state.bloom.add(jti)
+        announce_revocation(self._announced)
+    
+    def _announced(self, version):
+        # Our own bump needs no sync, unless another worker bumped in between
+        with self._lock:
+            if self._synced_version == version - 1:
+                self._synced_version = version
+    
+    def might_contain(self, jti):
+        """False only if ``jti`` is definitely not blacklisted; never queries the table"""
+        now = time.monotonic()
+        if now >= self._build_due:
+            self._schedule_rebuild()
+        
+        state = self._state
+        if state is None:
+            return True
+        # The version is read before syncing, so a bump racing the sync
+        # triggers another one on the next check
+        version = _version_cache().get(REVOCATION_VERSION_KEY, 0)
+        if version != self._synced_version or now >= self._sync_due:
+            self.sync(state, version)
+        return jti in state.bloom
+
+revoked_jtis = RevokedJtiFilter()
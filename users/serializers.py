@@ -1,8 +1,53 @@
 from rest_framework import serializers
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
 from django.contrib.auth.password_validation import validate_password
 from django.contrib.auth import authenticate
+from .instrumentation import timed
 from .models import User
+from .revocation import TOKEN_VERSION_CLAIM
+from .tokens import VersionedRefreshToken
+
+class TimedListSerializer(serializers.ListSerializer):
+    """``many=True`` counterpart of ``TimedRepresentationMixin``"""
+    
+    @property
+    def data(self):
+        with timed('serialize'):
+            return super().data
+
+class TimedRepresentationMixin:
+    """Add ``.data`` (``to_representation``) to the request's ``serialize`` timing.
+    
+    Response serializers use it together with ``Meta.list_serializer_class =
+    TimedListSerializer``; the renderer times the JSON encoding on its own.
+    """
+    
+    @property
+    def data(self):
+        with timed('serialize'):
+            return super().data
+
+class SparseFieldsetMixin:
+    """Limit output to the comma-separated ``?fields=`` query parameter"""
+    
+    fields_query_param = 'fields'
+    
+    @classmethod
+    def get_requested_fields(cls, request):
+        """Requested field names, or None when the client wants everything"""
+        if request is None:
+            return None
+        raw = request.query_params.get(cls.fields_query_param, '')
+        requested = {name.strip() for name in raw.split(',') if name.strip()}
+        return requested or None
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        
+        requested = self.get_requested_fields(self.context.get('request'))
+        if requested is not None:
+            for name in set(self.fields) - requested:
+                self.fields.pop(name)
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     """Custom JWT serializer to include user info in token"""
@@ -16,6 +61,7 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         token['role'] = user.role
         token['full_name'] = user.full_name
         token['user_id'] = user.id
+        token[TOKEN_VERSION_CLAIM] = user.token_version
         
         return token
     
@@ -32,6 +78,10 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         
         return data
 
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refresh serializer that rejects tokens revoked through token_version"""
+    token_class = VersionedRefreshToken
+
 class RegistrationSerializer(serializers.ModelSerializer):
     """Serializer for public user registration (user role only)"""
     
@@ -103,18 +153,20 @@ class AdminUserCreateSerializer(serializers.ModelSerializer):
         )
         return user
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     """Serializer for user profile information"""
     
     class Meta:
         model = User
         fields = ['id', 'email', 'full_name', 'role', 'date_joined', 'is_active']
         read_only_fields = ['id', 'date_joined', 'role']
+        list_serializer_class = TimedListSerializer
 
-class UserListSerializer(serializers.ModelSerializer):
+class UserListSerializer(TimedRepresentationMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for admin to view all users"""
     
     class Meta:
         model = User
         fields = ['id', 'email', 'full_name', 'role', 'date_joined', 'is_active']
-        read_only_fields = ['id', 'date_joined']
\ No newline at end of file
+        read_only_fields = ['id', 'date_joined']
+        list_serializer_class = TimedListSerializer
\ No newline at end of file
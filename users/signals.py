@@ -1,15 +1,49 @@
-from django.db.models.signals import post_save, post_delete
-from django.dispatch import receiver
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import Signal, receiver
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from .dashboard import invalidate_admin_dashboard
+from .revocation import forget_token_version
 import logging
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
+# Sent once per bulk_create batch by users.provisioning (post_save does not fire)
+users_provisioned = Signal()
+
+@receiver(pre_save, sender=User)
+def user_access_changed_handler(sender, instance, update_fields=None, **kwargs):
+    """Flag users whose role or active flag is about to change"""
+    instance._access_changed = False
+    if instance.pk is None:
+        return
+    
+    # Saves such as update_last_login() cannot change access, skip the lookup
+    if update_fields is not None and not {'role', 'is_active'} & set(update_fields):
+        return
+    
+    previous = User.objects.filter(pk=instance.pk).values('role', 'is_active').first()
+    if previous is not None:
+        instance._access_changed = (
+            previous['role'] != instance.role or
+            previous['is_active'] != instance.is_active
+        )
+
 @receiver(post_save, sender=User)
 def user_created_handler(sender, instance, created, **kwargs):
     """Handle user creation events"""
+    forget_token_version(instance.pk)
+    
+    if created or getattr(instance, '_access_changed', False):
+        transaction.on_commit(invalidate_admin_dashboard)
+    
+    if getattr(instance, '_access_changed', False):
+        instance._access_changed = False
+        instance.revoke_tokens()
+        logger.info(f'Tokens revoked for {instance.email} after role/status change')
+    
     if created:
         logger.info(f'New user created: {instance.email} with role {instance.role}')
         
@@ -22,4 +56,19 @@ def user_created_handler(sender, instance, created, **kwargs):
 @receiver(post_delete, sender=User)
 def user_deleted_handler(sender, instance, **kwargs):
     """Handle user deletion events"""
-    logger.warning(f'User deleted: {instance.email} (role: {instance.role})')
\ No newline at end of file
+    forget_token_version(instance.pk)
+    transaction.on_commit(invalidate_admin_dashboard)
+    logger.warning(f'User deleted: {instance.email} (role: {instance.role})')
+
+@receiver(users_provisioned)
+def users_provisioned_handler(sender, users, **kwargs):
+    """Handle a batch of bulk-created users with one log entry"""
+    transaction.on_commit(invalidate_admin_dashboard)
+    
+    roles = {}
+    for user in users:
+        roles[user.role] = roles.get(user.role, 0) + 1
+    summary = ', '.join(f'{count} {role}' for role, count in sorted(roles.items()))
+    logger.info(f'Bulk provisioned {len(users)} users ({summary})')
+    if roles.get('editor'):
+        logger.info(f"Editor users created in bulk: {roles['editor']}")
@@ -1,10 +1,14 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
+from .serializers import CustomTokenObtainPairSerializer
 import json
+import logging
+
+from asgiref.sync import sync_to_async
 
 User = get_user_model()
 
@@ -149,8 +153,8 @@ class RoleBasedAccessTest(APITestCase):
         )
     
     def get_token(self, user):
-        """Helper method to get JWT token for user"""
-        refresh = RefreshToken.for_user(user)
+        """Helper method to get JWT token for user, with the claims login issues"""
+        refresh = CustomTokenObtainPairSerializer.get_token(user)
         return str(refresh.access_token)
     
     def test_admin_create_user_access(self):
@@ -230,3 +234,765 @@ class RoleBasedAccessTest(APITestCase):
         
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+class ClaimsAuthenticationTest(APITestCase):
+    """Test stateless claim-based authentication"""
+    
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email='admin@example.com',
+            full_name='Admin User',
+            password='adminpass123',
+            role='admin'
+        )
+        self.editor = User.objects.create_user(
+            email='editor@example.com',
+            full_name='Editor User',
+            password='editorpass123',
+            role='editor'
+        )
+    
+    def get_request(self, user):
+        """Helper to build a request carrying a login access token"""
+        from rest_framework.test import APIRequestFactory
+        from rest_framework.request import Request
+        
+        token = CustomTokenObtainPairSerializer.get_token(user).access_token
+        return Request(APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}'))
+    
+    def authenticate(self, request):
+        from .authentication import ClaimsJWTAuthentication
+        return ClaimsJWTAuthentication().authenticate(request)[0]
+    
+    def test_role_checks_without_queries(self):
+        """Test permissions and post visibility run without database queries"""
+        from posts.models import Post
+        from .permissions import IsAdmin, IsEditorOrAdmin
+        from .revocation import get_token_version
+        
+        post = Post(author_id=self.editor.pk, status='pending')
+        request = self.get_request(self.editor)
+        get_token_version(self.editor.pk)  # warm the token version cache
+        with self.assertNumQueries(0):
+            user = self.authenticate(request)
+            request.user = user
+            self.assertFalse(IsAdmin().has_permission(request, None))
+            self.assertTrue(IsEditorOrAdmin().has_permission(request, None))
+            self.assertTrue(post.can_be_viewed_by(user))
+            self.assertEqual(user.email, self.editor.email)
+    
+    def test_lazy_instance_load(self):
+        """Test unclaimed attributes load the user row once"""
+        from .authentication import get_user_instance
+        
+        user = self.authenticate(self.get_request(self.admin))
+        with self.assertNumQueries(1):
+            self.assertEqual(user.date_joined, self.admin.date_joined)
+            self.assertEqual(get_user_instance(user), self.admin)
+        self.assertEqual(user, self.admin)
+
+class TokenRevocationTest(APITestCase):
+    """Test token_version based revocation"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='user@example.com',
+            full_name='Regular User',
+            password='userpass123'
+        )
+        self.login = self.client.post(reverse('token_obtain_pair'), {
+            'email': 'user@example.com',
+            'password': 'userpass123'
+        }).data
+    
+    def test_logout_all_revokes_tokens(self):
+        """Test logging out everywhere invalidates access and refresh tokens"""
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.login['access']}")
+        response = self.client.post(reverse('logout_all'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        response = self.client.get(reverse('user_profile'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        
+        self.client.credentials()
+        response = self.client.post(reverse('token_refresh'), {'refresh': self.login['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_role_change_revokes_tokens(self):
+        """Test changing a user's role bumps the token version"""
+        self.user.role = 'editor'
+        self.user.save()
+        self.assertEqual(self.user.token_version, 1)
+        
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.login['access']}")
+        response = self.client.get(reverse('user_profile'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_prune_token_blacklist(self):
+        """Test expired outstanding and blacklisted tokens are pruned"""
+        from datetime import timedelta
+        from django.core.management import call_command
+        from django.utils import timezone
+        from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+        
+        expired = OutstandingToken.objects.create(
+            user=self.user, jti='expired', token='x',
+            expires_at=timezone.now() - timedelta(days=1)
+        )
+        BlacklistedToken.objects.create(token=expired)
+        
+        call_command('prune_token_blacklist', '--batch-size', '1', stdout=open('/dev/null', 'w'))
+        self.assertFalse(OutstandingToken.objects.filter(jti='expired').exists())
+        self.assertTrue(OutstandingToken.objects.exists())
+
+class RevokedJtiFilterTest(APITestCase):
+    """Test the in-memory revoked jti filter"""
+    
+    def test_bloom_filter_has_no_false_negatives(self):
+        """Test every added item is reported as possibly present"""
+        from .revocation import BloomFilter
+        
+        bloom = BloomFilter(1000)
+        items = [f'jti-{i}' for i in range(1000)]
+        for item in items:
+            bloom.add(item)
+        
+        self.assertTrue(all(item in bloom for item in items))
+        false_positives = sum(f'other-{i}' in bloom for i in range(1000))
+        self.assertLess(false_positives, 50)
+    
+    def test_rotated_refresh_token_is_rejected(self):
+        """Test a refresh token cannot be reused after rotation"""
+        from .revocation import revoked_jtis
+        
+        user = User.objects.create_user(
+            email='user@example.com',
+            full_name='Regular User',
+            password='userpass123'
+        )
+        revoked_jtis.reset()
+        revoked_jtis.rebuild()
+        refresh = str(RefreshToken.for_user(user))
+        
+        response = self.client.post(reverse('token_refresh'), {'refresh': refresh})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        response = self.client.post(reverse('token_refresh'), {'refresh': refresh})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    @override_settings(REVOKED_JTI_FILTER_SYNC_INTERVAL=3600)
+    def test_rows_from_other_workers_are_seen_immediately(self):
+        """Test rows blacklisted elsewhere, even out of id order, are never missed"""
+        from datetime import timedelta
+        from django.utils import timezone
+        from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+        from .revocation import RevokedJtiFilter, announce_revocation
+        
+        user = User.objects.create_user(email='user@example.com', full_name='Regular User')
+        expires_at = timezone.now() + timedelta(days=1)
+        first, second, third = (
+            OutstandingToken.objects.create(user=user, jti=jti, token='', expires_at=expires_at)
+            for jti in ('first', 'second', 'third')
+        )
+        BlacklistedToken.objects.create(id=10, token=second)
+        
+        jtis = RevokedJtiFilter()
+        jtis.rebuild()
+        self.assertTrue(jtis.might_contain('second'))
+        
+        def blacklist_elsewhere(row_id, token):
+            with self.captureOnCommitCallbacks(execute=True):
+                BlacklistedToken.objects.create(id=row_id, token=token)
+                announce_revocation()
+        
+        # Another worker rotates a token right after our sync; id 11 is still uncommitted
+        blacklist_elsewhere(12, third)
+        self.assertTrue(jtis.might_contain('third'))
+        self.assertFalse(jtis.might_contain('first'))
+        
+        # The transaction holding the earlier id commits late: its id was a tracked gap
+        blacklist_elsewhere(11, first)
+        self.assertTrue(jtis.might_contain('first'))
+    
+    @override_settings(REVOKED_JTI_FILTER_SYNC_INTERVAL=3600)
+    def test_negative_lookup_skips_the_database(self):
+        """Test a jti missing from a synced filter is answered without queries"""
+        from .revocation import RevokedJtiFilter
+        
+        jtis = RevokedJtiFilter()
+        jtis.rebuild()
+        with self.assertNumQueries(0):
+            self.assertFalse(jtis.might_contain('never-blacklisted'))
+        
+        # This process's own rotation is already in the filter: no sync needed
+        with self.captureOnCommitCallbacks(execute=True):
+            jtis.add('rotated')
+        with self.assertNumQueries(0):
+            self.assertFalse(jtis.might_contain('never-blacklisted'))
+            self.assertTrue(jtis.might_contain('rotated'))
+    
+    def test_unbuilt_filter_defers_to_the_table(self):
+        """Test every check goes to the blacklist table until a build finishes"""
+        from unittest import mock
+        from .revocation import RevokedJtiFilter
+        
+        jtis = RevokedJtiFilter()
+        with mock.patch.object(RevokedJtiFilter, '_schedule_rebuild') as schedule:
+            self.assertTrue(jtis.might_contain('anything'))
+        schedule.assert_called_once()
+
+class VerifiedTokenCacheTest(TestCase):
+    """Test the shared verified token cache"""
+    
+    def test_token_decoded_once_while_hot(self):
+        """Test the utility and authentication backend share cached payloads"""
+        from .token_cache import verified_tokens
+        from .tokens import CachedAccessToken
+        from .utils import validate_jwt_token
+        
+        user = User.objects.create_user(email='user@example.com', full_name='Regular User')
+        token = str(CustomTokenObtainPairSerializer.get_token(user).access_token)
+        verified_tokens.clear()
+        
+        self.assertEqual(validate_jwt_token(token)['user_id'], user.id)
+        self.assertEqual(CachedAccessToken(token)['user_id'], user.id)
+        self.assertEqual(verified_tokens.stats()['misses'], 1)
+        self.assertEqual(verified_tokens.stats()['hits'], 1)
+    
+    def test_entries_expire_and_evict(self):
+        """Test expired entries are dropped and the cache stays bounded"""
+        import time
+        from .token_cache import VerifiedTokenCache
+        
+        cache = VerifiedTokenCache(maxsize=2)
+        cache.set('expired', {'exp': time.time() - 1})
+        self.assertIsNone(cache.get('expired'))
+        
+        for name in ('a', 'b', 'c'):
+            cache.set(name, {'exp': time.time() + 60})
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats()['size'], 2)
+
+class JWTAccessControlMiddlewareTest(APITestCase):
+    """Test the compiled route policy of JWTAccessControlMiddleware"""
+    
+    def test_longest_prefix_wins(self):
+        """Test route policy lookups pick the most specific rule"""
+        from .middleware import RoutePolicy
+        
+        policy = RoutePolicy([
+            ('/api/', ['user', 'editor', 'admin']),
+            ('/api/admin/', ['admin']),
+            ('/api/admin/public/', None),
+        ])
+        self.assertEqual(policy.match('/api/admin/dashboard/'), ('/api/admin/', ('admin',)))
+        self.assertEqual(policy.match('/api/admin/public/x'), ('/api/admin/public/', None))
+        self.assertEqual(policy.match('/api/posts/')[0], '/api/')
+        self.assertIsNone(policy.match('/swagger/'))
+    
+    def test_prefixes_match_whole_segments(self):
+        """Test a rule without a trailing slash does not cover longer names"""
+        from .middleware import RoutePolicy
+        
+        policy = RoutePolicy([('/metrics', ['admin']), ('/api/', ['user'])])
+        self.assertEqual(policy.match('/metrics')[0], '/metrics')
+        self.assertEqual(policy.match('/metrics/extra')[0], '/metrics')
+        self.assertIsNone(policy.match('/metricsX'))
+        self.assertEqual(policy.match('/api/anything')[0], '/api/')
+    
+    def test_token_without_role_claim_is_denied(self):
+        """Test a token lacking the role claim cannot pass a role-restricted path"""
+        admin = User.objects.create_user(email='admin@example.com', full_name='Admin User', role='admin')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(admin).access_token}')
+        
+        response = self.client.get(reverse('admin_dashboard'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+    
+    def test_middleware_blocks_by_role_claim(self):
+        """Test editors are stopped at the middleware for admin paths"""
+        editor = User.objects.create_user(
+            email='editor@example.com',
+            full_name='Editor User',
+            role='editor'
+        )
+        token = CustomTokenObtainPairSerializer.get_token(editor).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        
+        response = self.client.get(reverse('admin_dashboard'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.json()['message'], 'Admin access required')
+        
+        response = self.client.get(reverse('editor_dashboard'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+class AdminDashboardSnapshotTest(APITestCase):
+    """Test the aggregated admin dashboard snapshot"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        
+        self.admin = User.objects.create_user(
+            email='admin@example.com',
+            full_name='Admin User',
+            role='admin'
+        )
+        User.objects.create_user(email='user@example.com', full_name='Regular User')
+        token = CustomTokenObtainPairSerializer.get_token(self.admin).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    
+    def test_stats_use_one_query_per_table(self):
+        """Test dashboard counts come from two aggregate queries"""
+        from .dashboard import compute_admin_stats
+        
+        with self.assertNumQueries(2):
+            stats = compute_admin_stats()
+        self.assertEqual(stats['total_admins'], 1)
+        self.assertEqual(stats['total_users'], 1)
+        self.assertEqual(stats['total_posts'], 0)
+    
+    def test_snapshot_is_reused(self):
+        """Test a fresh snapshot is served without recomputing"""
+        from unittest import mock
+        
+        response = self.client.get(reverse('admin_dashboard'))
+        self.assertEqual(response.data['total_users'], 1)
+        
+        with mock.patch('users.dashboard.compute_admin_stats') as compute:
+            response = self.client.get(reverse('admin_dashboard'))
+        compute.assert_not_called()
+        self.assertEqual(response.data['total_admins'], 1)
+    
+    def test_slow_refresh_keeps_the_next_holders_lock(self):
+        """Test a refresh outliving its lock does not release another worker's lock"""
+        from unittest import mock
+        from django.core.cache import cache
+        from .dashboard import LOCK_KEY, compute_admin_stats, get_admin_stats
+        
+        def expire_and_relock():
+            # Our lock expires mid-refresh and another worker takes it
+            cache.set(LOCK_KEY, 'other-worker')
+            return compute_admin_stats()
+        
+        with mock.patch('users.dashboard.compute_admin_stats', expire_and_relock):
+            get_admin_stats()
+        self.assertEqual(cache.get(LOCK_KEY), 'other-worker')
+    
+    def test_cold_start_waits_for_lock_holder(self):
+        """Test a worker losing the cold-start lock serves the winner's snapshot"""
+        import time
+        from unittest import mock
+        from django.core.cache import cache
+        from .dashboard import LOCK_KEY, SNAPSHOT_KEY, compute_admin_stats
+        
+        # Another worker holds the lock and publishes its snapshot while we wait
+        cache.add(LOCK_KEY, 1)
+        winner = {'stats': compute_admin_stats(), 'version': 0, 'computed_at': time.time()}
+        publish = lambda seconds: cache.set(SNAPSHOT_KEY, winner)
+        with mock.patch('users.dashboard.time.sleep', publish):
+            with mock.patch('users.dashboard.compute_admin_stats') as compute:
+                response = self.client.get(reverse('admin_dashboard'))
+        compute.assert_not_called()
+        self.assertEqual(response.data['total_users'], 1)
+
+class ProfileConditionalRequestTest(APITestCase):
+    """Test ETag handling on the profile endpoint"""
+    
+    def test_profile_etag(self):
+        """Test profile ETags answer 304 and change after an update"""
+        user = User.objects.create_user(email='user@example.com', full_name='Regular User')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {CustomTokenObtainPairSerializer.get_token(user).access_token}')
+        url = reverse('user_profile')
+        
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        response = self.client.patch(url, {'full_name': 'Renamed User'}, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.patch(url, {'full_name': 'Other Name'}, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+class UserExportTest(APITestCase):
+    """Test streaming user exports"""
+    
+    def test_export_filters_by_role(self):
+        """Test the user export streams only the requested role"""
+        import json
+        
+        admin = User.objects.create_user(email='admin@example.com', full_name='Admin User', role='admin')
+        User.objects.create_user(email='user@example.com', full_name='Regular User')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {CustomTokenObtainPairSerializer.get_token(admin).access_token}')
+        
+        response = self.client.get(reverse('user_export'), {'role': 'user', 'joined_after': '2000-01-01'})
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['email'] for row in rows], ['user@example.com'])
+        self.assertNotIn('password', rows[0])
+    
+    def test_invalid_date_and_formula_cells(self):
+        """Test impossible dates are a 400 and CSV cells cannot run as formulas"""
+        admin = User.objects.create_user(email='admin@example.com', full_name='Admin User', role='admin')
+        User.objects.create_user(email='sheet@example.com', full_name='=HYPERLINK("http://evil")')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {CustomTokenObtainPairSerializer.get_token(admin).access_token}')
+        
+        response = self.client.get(reverse('user_export'), {'joined_after': '2024-02-30'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        response = self.client.get(reverse('user_export'), {'output': 'csv'})
+        body = b''.join(response.streaming_content).decode()
+        self.assertIn('\'=HYPERLINK', body)
+        self.assertNotIn(',=HYPERLINK', body)
+
+class BulkUserProvisioningTest(APITestCase):
+    """Test bulk user provisioning"""
+    
+    def setUp(self):
+        self.admin = User.objects.create_user(email='admin@example.com', full_name='Admin User', role='admin')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {CustomTokenObtainPairSerializer.get_token(self.admin).access_token}')
+    
+    @override_settings(USER_PROVISIONING_WORKERS=1)
+    def test_bulk_create_reports_each_row(self):
+        """Test valid rows are created and invalid or duplicate rows reported"""
+        rows = [
+            {'email': 'one@example.com', 'full_name': 'One', 'password': 'BulkPass123!', 'role': 'editor'},
+            {'email': 'admin@example.com', 'full_name': 'Dup', 'password': 'BulkPass123!'},
+            {'email': 'two@example.com', 'full_name': 'Two', 'password': 'BulkPass123!', 'role': 'admin'},
+            {'email': 'three@example.com', 'full_name': 'Three', 'password': 'BulkPass123!'},
+        ]
+        with self.assertLogs('users.signals', level='INFO') as logs:
+            response = self.client.post(reverse('admin_bulk_create_users'), rows, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(
+            [result['status'] for result in response.data['results']],
+            ['created', 'invalid', 'invalid', 'created']
+        )
+        self.assertEqual(len(logs.output), 2)
+        
+        editor = User.objects.get(email='one@example.com')
+        self.assertEqual(editor.role, 'editor')
+        self.assertTrue(editor.check_password('BulkPass123!'))
+    
+    def test_email_taken_after_precheck(self):
+        """Test a row losing a race to a concurrent insert is reported, not a 500"""
+        from unittest import mock
+        from django.contrib.auth.hashers import make_password
+        
+        def hash_and_race(passwords, workers=None):
+            User.objects.create_user(email='race@example.com', full_name='Concurrent Signup')
+            return [make_password(password) for password in passwords]
+        
+        rows = [
+            {'email': 'race@example.com', 'full_name': 'Race', 'password': 'BulkPass123!'},
+            {'email': 'calm@example.com', 'full_name': 'Calm', 'password': 'BulkPass123!'},
+        ]
+        with mock.patch('users.provisioning.hash_passwords', hash_and_race):
+            response = self.client.post(reverse('admin_bulk_create_users'), rows, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([result['status'] for result in response.data['results']], ['invalid', 'created'])
+        self.assertIn('email', response.data['results'][0]['errors'])
+        self.assertTrue(User.objects.filter(email='calm@example.com').exists())
+    
+    @override_settings(USER_PROVISIONING_MAX_ROWS=2)
+    def test_row_limit(self):
+        """Test uploads over the row limit are refused before any hashing"""
+        from unittest import mock
+        
+        rows = [{'email': f'user{i}@example.com', 'full_name': 'User', 'password': 'BulkPass123!'} for i in range(3)]
+        with mock.patch('users.provisioning.hash_passwords') as hash_passwords:
+            response = self.client.post(reverse('admin_bulk_create_users'), rows, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('provision_users', response.data['error'])
+        hash_passwords.assert_not_called()
+        self.assertFalse(User.objects.filter(email__startswith='user').exists())
+    
+    @override_settings(USER_PROVISIONING_WORKERS=1)
+    def test_csv_upload_dry_run(self):
+        """Test CSV uploads validate without writing in dry-run mode"""
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        
+        upload = SimpleUploadedFile(
+            'users.csv',
+            b'email,full_name,password,role\nnew@example.com,New User,BulkPass123!,user\n'
+        )
+        response = self.client.post(
+            f"{reverse('admin_bulk_create_users')}?dry_run=true", {'file': upload}, format='multipart'
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['status'], 'valid')
+        self.assertFalse(User.objects.filter(email='new@example.com').exists())
+
+class AsyncUserViewsTest(APITestCase):
+    """Test the native async profile and dashboard endpoints"""
+    
+    def setUp(self):
+        self.admin = User.objects.create_user(email='admin@example.com', full_name='Admin User', role='admin')
+        self.editor = User.objects.create_user(email='editor@example.com', full_name='Editor User', role='editor')
+    
+    def login(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {CustomTokenObtainPairSerializer.get_token(user).access_token}')
+    
+    def test_async_profile_and_dashboards(self):
+        """Test async reads honour roles like their sync counterparts"""
+        self.login(self.editor)
+        self.assertEqual(self.client.get(reverse('async_user_profile')).json()['email'], self.editor.email)
+        self.assertEqual(self.client.get(reverse('async_editor_dashboard')).json()['my_posts'], 0)
+        self.assertEqual(
+            self.client.get(reverse('async_admin_dashboard')).status_code, status.HTTP_403_FORBIDDEN
+        )
+        
+        self.login(self.admin)
+        response = self.client.get(reverse('async_admin_dashboard'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['total_editors'], 1)
+    
+    async def test_async_client_request(self):
+        """Test the endpoints through the ASGI handler and async middleware"""
+        from django.test import AsyncClient
+        
+        token = await sync_to_async(lambda: str(CustomTokenObtainPairSerializer.get_token(self.editor).access_token))()
+        client = AsyncClient()
+        headers = {'Authorization': f'Bearer {token}'}
+        
+        response = await client.get(reverse('async_editor_dashboard'), headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = await client.get(reverse('async_admin_dashboard'), headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+    
+    def test_async_rejects_revoked_token(self):
+        token = CustomTokenObtainPairSerializer.get_token(self.editor).access_token
+        self.editor.revoke_tokens()
+        
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        response = self.client.get(reverse('async_user_profile'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+class PerformanceMiddlewareTest(APITestCase):
+    """Test request instrumentation"""
+    
+    def setUp(self):
+        self.admin = User.objects.create_user(email='admin@example.com', full_name='Admin User', role='admin')
+        token = CustomTokenObtainPairSerializer.get_token(self.admin).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    
+    def test_server_timing_and_structured_log(self):
+        """Test timings are exposed as Server-Timing and one perf log record"""
+        with self.assertLogs('users.instrumentation', level='INFO') as logs:
+            response = self.client.get(reverse('admin_profiles'))
+        
+        timing = response['Server-Timing']
+        for name in ('total;dur=', 'db;dur=', 'jwt;dur=', 'serialize;dur='):
+            self.assertIn(name, timing)
+        
+        self.assertEqual(len(logs.records), 1)
+        record = logs.records[0].perf
+        self.assertEqual(record['route'], 'admin_profiles')
+        self.assertEqual(record['user'], self.admin.email)
+        self.assertGreater(record['queries'], 0)
+        self.assertGreater(record['serialize_ms'], 0)
+    
+    def test_serializer_representation_is_timed(self):
+        """Test to_representation, run in the view before rendering, counts as serialize time"""
+        import time
+        from unittest import mock
+        from .serializers import UserListSerializer
+        
+        original = UserListSerializer.to_representation
+        def slow(serializer, instance):
+            time.sleep(0.02)
+            return original(serializer, instance)
+        
+        with mock.patch.object(UserListSerializer, 'to_representation', slow):
+            with self.assertLogs('users.instrumentation', level='INFO') as logs:
+                self.client.get(reverse('admin_profiles'))
+        self.assertGreaterEqual(logs.records[0].perf['serialize_ms'], 20)
+    
+    @override_settings(PERF_QUERY_BUDGETS={'admin_profiles': 0})
+    def test_query_budget_warning(self):
+        with self.assertLogs('users.instrumentation', level='WARNING') as logs:
+            self.client.get(reverse('admin_profiles'))
+        self.assertIn('Query budget exceeded on admin_profiles', logs.output[0])
+    
+    async def test_queries_counted_under_asgi(self):
+        """Test ORM calls in sync_to_async threads count against the request"""
+        from django.test import AsyncClient
+        
+        token = await sync_to_async(lambda: str(CustomTokenObtainPairSerializer.get_token(self.admin).access_token))()
+        client = AsyncClient()
+        headers = {'Authorization': f'Bearer {token}'}
+        
+        for url in (reverse('admin_profiles'), reverse('async_post_list')):
+            response = await client.get(url, headers=headers)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('desc="0 queries"', response['Server-Timing'])
+    
+    def test_streaming_response_recorded_after_body(self):
+        """Test streamed exports are logged once the body has been consumed"""
+        with self.assertLogs('users.instrumentation', level='INFO') as logs:
+            response = self.client.get(reverse('user_export'))
+            self.assertNotIn('Server-Timing', response)
+            logger = logging.getLogger('users.instrumentation')
+            logger.info('body not consumed yet')
+            b''.join(response.streaming_content)
+        
+        self.assertEqual(logs.records[0].getMessage(), 'body not consumed yet')
+        record = logs.records[1].perf
+        self.assertEqual(record['route'], 'user_export')
+        self.assertGreater(record['queries'], 0)
+    
+    def test_auth_failure_is_tagged(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer not-a-token')
+        with self.assertLogs('users.instrumentation', level='INFO') as logs:
+            self.client.get(reverse('user_profile'))
+        self.assertEqual(logs.records[0].perf['auth_failure'], 'invalid')
+
+class MetricsEndpointTest(APITestCase):
+    """Test the Prometheus metrics endpoint"""
+    
+    def setUp(self):
+        self.admin = User.objects.create_user(email='admin@example.com', full_name='Admin User', role='admin')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {CustomTokenObtainPairSerializer.get_token(self.admin).access_token}')
+    
+    def scrape(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.content.decode()
+    
+    def test_request_and_auth_failure_metrics(self):
+        """Test requests, latency and rejected tokens show up in the scrape"""
+        self.client.get(reverse('admin_dashboard'))
+        self.client.get(reverse('admin_dashboard'))
+        before = self.scrape()
+        
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer not-a-token')
+        self.client.get(reverse('user_profile'))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {CustomTokenObtainPairSerializer.get_token(self.admin).access_token}')
+        text = self.scrape()
+        
+        self.assertIn('# TYPE http_request_duration_seconds histogram', text)
+        self.assertIn('http_requests_total{method="GET",route="admin_dashboard",status="200"}', text)
+        self.assertIn('http_request_duration_seconds_bucket{route="admin_dashboard",le="+Inf"}', text)
+        self.assertIn('cache_hit_ratio{cache="admin_dashboard"}', text)
+        
+        def failures(body):
+            lines = [line for line in body.splitlines() if line.startswith('jwt_auth_failures_total{reason="invalid"}')]
+            return int(float(lines[0].split()[-1])) if lines else 0
+        self.assertEqual(failures(text), failures(before) + 1)
+    
+    def test_metrics_admin_only(self):
+        editor = User.objects.create_user(email='editor@example.com', full_name='Editor User', role='editor')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {CustomTokenObtainPairSerializer.get_token(editor).access_token}')
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, status.HTTP_403_FORBIDDEN)
+    
+    def test_multiprocess_aggregation(self):
+        """Test worker files in METRICS_MULTIPROCESS_DIR are summed"""
+        import tempfile
+        from .metrics import registry
+        
+        with tempfile.TemporaryDirectory() as directory:
+            with open(f'{directory}/metrics-999999.json', 'w') as handle:
+                json.dump({
+                    'counters': [['auth_logins_total', [['outcome', 'success']], 1000]],
+                    'histograms': [],
+                }, handle)
+            
+            with override_settings(METRICS_MULTIPROCESS_DIR=directory):
+                text = registry.render()
+        
+        line = next(line for line in text.splitlines() if line.startswith('auth_logins_total{outcome="success"}'))
+        self.assertGreaterEqual(float(line.split()[-1]), 1000)
+
+@override_settings(THROTTLE_BUCKETS={'login': {'ip': (5, 60), 'email': (2, 60)}, 'register': {'ip': (2, 60)}})
+class LoginThrottleTest(APITestCase):
+    """Test token bucket throttling of login and registration"""
+    
+    def setUp(self):
+        from .throttling import reset_store
+        
+        reset_store()
+        self.addCleanup(reset_store)
+        User.objects.create_user(email='user@example.com', full_name='Regular User', password='testpass123')
+    
+    def login(self, email, address='10.0.0.1'):
+        return self.client.post(
+            reverse('token_obtain_pair'), {'email': email, 'password': 'wrongpass'}, REMOTE_ADDR=address
+        )
+    
+    def test_email_bucket_rejects_before_hashing(self):
+        """Test the email bucket answers 429 across addresses without authenticating"""
+        from unittest import mock
+        
+        self.assertEqual(self.login('user@example.com').status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.login('USER@example.com', '10.0.0.2').status_code, status.HTTP_401_UNAUTHORIZED)
+        
+        with mock.patch('rest_framework_simplejwt.serializers.authenticate') as authenticate:
+            response = self.login('user@example.com', '10.0.0.3')
+        authenticate.assert_not_called()
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertGreater(int(response['Retry-After']), 0)
+        
+        # Other accounts are unaffected
+        self.assertEqual(self.login('other@example.com', '10.0.0.3').status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_throttled_requests_exported(self):
+        """Test refusals are counted at /metrics"""
+        for _ in range(3):
+            self.login('user@example.com')
+        
+        admin = User.objects.create_user(email='admin@example.com', full_name='Admin User', role='admin')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {CustomTokenObtainPairSerializer.get_token(admin).access_token}')
+        text = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('# TYPE throttled_requests_total counter', text)
+        self.assertIn('throttled_requests_total{bucket="email",scope="login"}', text)
+    
+    def test_ip_bucket(self):
+        """Test one address is limited even when it cycles through emails"""
+        for number in range(5):
+            self.assertEqual(self.login(f'guess{number}@example.com').status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.login('guess5@example.com').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(self.login('guess5@example.com', '10.0.0.9').status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_registration_throttled(self):
+        """Test registration has its own per-address bucket"""
+        for number in range(2):
+            response = self.client.post(reverse('register'), {
+                'email': f'new{number}@example.com', 'full_name': 'New User',
+                'password': 'testpass123', 'password_confirm': 'testpass123'
+            })
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.post(reverse('register'), {'email': 'new2@example.com'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+    
+    def test_forwarded_for_is_not_trusted(self):
+        """Test spoofed X-Forwarded-For values do not give fresh IP buckets"""
+        for number in range(6):
+            response = self.client.post(
+                reverse('token_obtain_pair'),
+                {'email': f'guess{number}@example.com', 'password': 'wrongpass'},
+                REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR=f'203.0.113.{number}'
+            )
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+    
+    def test_local_store_eviction(self):
+        """Test refilled buckets are evicted and live ones never are"""
+        from .throttling import LocalBucketStore
+        
+        store = LocalBucketStore(max_buckets=3)
+        self.assertEqual(store.consume('ip', b'a', 1, 1.0, now=0), 0)
+        self.assertAlmostEqual(store.consume('ip', b'a', 1, 1.0, now=0.5), 0.5)
+        store.consume('ip', b'b', 1, 1.0, now=0.5)
+        # Both buckets are full again by t=2, so they are swept
+        store.consume('ip', b'c', 1, 1.0, now=2)
+        self.assertEqual(len(store), 1)
+        
+        for key in (b'd', b'e'):
+            store.consume('ip', key, 1, 1.0, now=2)
+        # A full pool of live buckets refuses new keys instead of evicting
+        self.assertGreater(store.consume('ip', b'f', 1, 1.0, now=2.5), 0)
+        self.assertAlmostEqual(store.consume('ip', b'c', 1, 1.0, now=2.5), 0.5)
+        # Other kinds have their own pool
+        self.assertEqual(store.consume('email', b'a', 1, 1.0, now=2.5), 0)
+        self.assertEqual(len(store), 4)
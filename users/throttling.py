@@ -0,0 +1,157 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.throttling import BaseThrottle
+from .metrics import registry
+
+def bucket_key(scope, kind, ident):
+    """Fixed-size key, so long emails or addresses cost no more memory than short ones"""
+    return hashlib.blake2b(f'{scope}:{kind}:{ident}'.encode(), digest_size=12).digest()
+
+def refill(tokens, updated, capacity, rate, now):
+    return min(capacity, tokens + (now - updated) * rate)
+
+class LocalBucketStore:
+    """Per-process token buckets held as ``key -> (tokens, updated, full_at)``.
+    
+    Each bucket kind (``ip``, ``email``) has its own pool of at most
+    ``max_buckets`` entries, so a flood of one kind cannot push out the
+    other. A bucket that has refilled to capacity is indistinguishable from
+    a new one, so it is dropped once ``full_at`` passes; pools are kept in
+    last-update order, which makes that a cheap sweep from the front. Live
+    buckets are never evicted: when a pool is full of them, new keys of
+    that kind are refused until the oldest bucket refills.
+    """
+    
+    def __init__(self, max_buckets=100000):
+        self.max_buckets = max_buckets
+        self._pools = {}
+        self._lock = threading.Lock()
+    
+    def consume(self, kind, key, capacity, rate, now=None):
+        """Take one token; return 0 if allowed, else seconds until one is available"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            pool = self._pools.setdefault(kind, OrderedDict())
+            self._evict(pool, now)
+            entry = pool.pop(key, None)
+            if entry is None and len(pool) >= self.max_buckets:
+                return next(iter(pool.values()))[2] - now
+            tokens = capacity if entry is None else refill(entry[0], entry[1], capacity, rate, now)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            pool[key] = (tokens, now, now + (capacity - tokens) / rate)
+            return wait
+    
+    def _evict(self, pool, now):
+        while pool:
+            key, entry = next(iter(pool.items()))
+            if entry[2] > now:
+                break
+            del pool[key]
+    
+    def clear(self):
+        with self._lock:
+            self._pools.clear()
+    
+    def __len__(self):
+        return sum(len(pool) for pool in self._pools.values())
+
+class CacheBucketStore:
+    """Token buckets in a Django cache (``THROTTLE_CACHE_ALIAS``) shared by all workers.
+    
+    Each bucket expires from the cache when it would have refilled. The
+    read-modify-write is not atomic, so concurrent workers can admit a
+    request or two more than the bucket allows.
+    """
+    
+    def __init__(self, max_buckets=None):
+        self.cache = caches[getattr(settings, 'THROTTLE_CACHE_ALIAS', 'default')]
+    
+    def consume(self, kind, key, capacity, rate, now=None):
+        now = time.time() if now is None else now
+        cache_key = f'throttle:{key.hex()}'
+        entry = self.cache.get(cache_key)
+        tokens = capacity if entry is None else refill(entry[0], entry[1], capacity, rate, now)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        self.cache.set(cache_key, (tokens, now), timeout=max(1, int((capacity - tokens) / rate) + 1))
+        return wait
+    
+    def clear(self):
+        # Other data shares the cache; shared buckets simply expire on their own
+        pass
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    """The bucket store configured by ``THROTTLE_STORE``, built on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                store_class = import_string(getattr(settings, 'THROTTLE_STORE', 'users.throttling.LocalBucketStore'))
+                _store = store_class(max_buckets=getattr(settings, 'THROTTLE_MAX_BUCKETS', 100000))
+    return _store
+
+def reset_store():
+    """Forget all buckets and rebuild the store from settings on next use"""
+    global _store
+    with _store_lock:
+        if _store is not None:
+            _store.clear()
+        _store = None
+
+class TokenBucketThrottle(BaseThrottle):
+    """Per-IP and per-email token buckets for the view's ``throttle_scope``.
+    
+    ``THROTTLE_BUCKETS[scope]`` maps ``'ip'`` / ``'email'`` to ``(requests,
+    seconds)``: a burst of ``requests`` refilling evenly over ``seconds``.
+    DRF runs throttles before the handler, so a rejected login gets its 429
+    without reaching ``authenticate()`` and its password hashing. The client
+    address comes from DRF's ``get_ident``: ``REMOTE_ADDR`` unless
+    ``NUM_PROXIES`` says how many trusted proxies append to X-Forwarded-For.
+    """
+    
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        buckets = getattr(settings, 'THROTTLE_BUCKETS', {}).get(scope)
+        self.wait_seconds = 0.0
+        if not buckets:
+            return True
+        
+        store = get_store()
+        for kind, ident in (('ip', self.get_ident(request)), ('email', self.get_email(request))):
+            if kind not in buckets or not ident:
+                continue
+            requests, seconds = buckets[kind]
+            wait = store.consume(kind, bucket_key(scope, kind, ident), requests, requests / seconds)
+            if wait:
+                self.wait_seconds = wait
+                registry.inc('throttled_requests_total', scope=scope, bucket=kind)
+                return False
+        return True
+    
+    def get_email(self, request):
+        try:
+            email = request.data.get('email')
+        except AttributeError:
+            return None
+        if not isinstance(email, str):
+            return None
+        return email.strip().lower()
+    
+    def wait(self):
+        return self.wait_seconds
@@ -0,0 +1,116 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import jwt
+from django.conf import settings
+from rest_framework_simplejwt.backends import TokenBackend
+from rest_framework_simplejwt.settings import api_settings
+from .instrumentation import timed
+
+class VerifiedTokenCache:
+    """Bounded LRU cache of verified JWT payloads keyed by token digest.
+    
+    Entries expire at the token's own ``exp`` claim, so a cached payload is
+    never returned for a token that would now fail verification as expired.
+    """
+    
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _key(token):
+        if isinstance(token, str):
+            token = token.encode()
+        return hashlib.sha256(token).digest()
+    
+    def get(self, token):
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(entry[1])
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+    
+    def set(self, token, payload):
+        exp = payload.get('exp')
+        if exp is None:
+            return
+        
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (exp, dict(payload))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def stats(self):
+        """Hit/miss counters for tuning VERIFIED_TOKEN_CACHE_SIZE"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+        }
+
+verified_tokens = VerifiedTokenCache(getattr(settings, 'VERIFIED_TOKEN_CACHE_SIZE', 10000))
+
+def decode_token(token):
+    """Verify and decode a JWT, reusing the payload while the token is hot.
+    
+    Raises the same ``jwt.ExpiredSignatureError`` / ``jwt.InvalidTokenError``
+    exceptions as ``jwt.decode``.
+    """
+    with timed('jwt'):
+        payload = verified_tokens.get(token)
+        if payload is None:
+            payload = jwt.decode(
+                token,
+                api_settings.SIGNING_KEY,
+                algorithms=[api_settings.ALGORITHM]
+            )
+            verified_tokens.set(token, payload)
+    return payload
+
+class CachedTokenBackend(TokenBackend):
+    """simplejwt token backend that shares the verified token cache"""
+    
+    def decode(self, token, verify=True):
+        if not verify:
+            return super().decode(token, verify=False)
+        
+        with timed('jwt'):
+            payload = verified_tokens.get(token)
+            if payload is None:
+                payload = super().decode(token, verify=True)
+                verified_tokens.set(token, payload)
+        return payload
+
+cached_token_backend = CachedTokenBackend(
+    api_settings.ALGORITHM,
+    api_settings.SIGNING_KEY,
+    api_settings.VERIFYING_KEY,
+    api_settings.AUDIENCE,
+    api_settings.ISSUER,
+    api_settings.JWK_URL,
+    api_settings.LEEWAY,
+    api_settings.JSON_ENCODER,
+)
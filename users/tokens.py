@@ -0,0 +1,35 @@
+from django.conf import settings
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from .revocation import get_token_version, is_token_current, revoked_jtis
+from .token_cache import cached_token_backend
+
+class CachedAccessToken(AccessToken):
+    """Access token verified through the shared verified token cache"""
+    _token_backend = cached_token_backend
+
+class VersionedRefreshToken(RefreshToken):
+    """Refresh token that is also invalidated by bumping ``User.token_version``.
+    
+    Blacklist checks go through the in-process revoked jti filter first, so
+    the blacklist table is only queried when the filter reports a possible hit.
+    """
+    
+    def check_blacklist(self):
+        if getattr(settings, 'REVOKED_JTI_FILTER_ENABLED', True):
+            if not revoked_jtis.might_contain(self.payload[api_settings.JTI_CLAIM]):
+                return
+        super().check_blacklist()
+    
+    def blacklist(self):
+        blacklisted = super().blacklist()
+        revoked_jtis.add(self.payload[api_settings.JTI_CLAIM])
+        return blacklisted
+    
+    def verify(self, *args, **kwargs):
+        super().verify(*args, **kwargs)
+        
+        user_id = self.payload.get(api_settings.USER_ID_CLAIM)
+        if user_id is not None and not is_token_current(self.payload, get_token_version(user_id)):
+            raise TokenError('Token has been revoked')
@@ -1,6 +1,6 @@
 from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     # Public endpoints
@@ -8,6 +8,7 @@ urlpatterns = [
     path('login/', views.CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('token/', views.CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('logout-all/', views.logout_all, name='logout_all'),
     
     # User endpoints
     path('profile/', views.UserProfileView.as_view(), name='user_profile'),
@@ -15,9 +16,16 @@ urlpatterns = [
     
     # Admin endpoints
     path('admin/create-user/', views.AdminUserCreateView.as_view(), name='admin_create_user'),
+    path('admin/users/bulk/', views.BulkUserCreateView.as_view(), name='admin_bulk_create_users'),
     path('admin/profiles/', views.AdminProfilesListView.as_view(), name='admin_profiles'),
     path('admin/dashboard/', views.admin_dashboard, name='admin_dashboard'),
+    path('admin/export/users/', views.UserExportView.as_view(), name='user_export'),
     
     # Editor endpoints
     path('editor/dashboard/', views.editor_dashboard, name='editor_dashboard'),
+    
+    # Native async read endpoints for ASGI deployments
+    path('async/profile/', async_views.user_profile, name='async_user_profile'),
+    path('async/admin/dashboard/', async_views.admin_dashboard, name='async_admin_dashboard'),
+    path('async/editor/dashboard/', async_views.editor_dashboard, name='async_editor_dashboard'),
 ]
\ No newline at end of file
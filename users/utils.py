@@ -2,6 +2,7 @@ from django.contrib.auth import get_user_model
 from django.core.mail import send_mail
 from django.conf import settings
 import jwt
+from .token_cache import decode_token
 from datetime import datetime, timedelta
 import secrets
 import string
@@ -44,11 +45,7 @@ def send_welcome_email(user):
 def validate_jwt_token(token):
     """Validate JWT token and return user info"""
     try:
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=['HS256']
-        )
+        payload = decode_token(token)
         return payload
     except jwt.ExpiredSignatureError:
         return None
@@ -2,9 +2,11 @@ from rest_framework import generics, status, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenObtainPairView
+from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
-from django.db import models
+from django.db import models, transaction
+from django.http import HttpResponse
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from .models import User
@@ -16,10 +18,20 @@ from .serializers import (
     CustomTokenObtainPairSerializer
 )
 from .permissions import IsAdmin, IsEditorOrAdmin, IsUser, IsSelfOrAdmin
+from .authentication import get_user_instance
+from .conditional import ConditionalRequestMixin, make_etag
+from .dashboard import get_admin_stats
+from .exports import parse_after_id, parse_boundary, stream_rows
+from .metrics import registry
+from .pagination import UserCursorPagination
+from .provisioning import parse_rows, provision_users
+from .throttling import TokenBucketThrottle
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     """Custom JWT login view with user info"""
     serializer_class = CustomTokenObtainPairSerializer
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'login'
     
     @swagger_auto_schema(
         operation_description="Login with email and password to get JWT tokens",
@@ -60,11 +72,26 @@ class CustomTokenObtainPairView(TokenObtainPairView):
     def post(self, request, *args, **kwargs):
         return super().post(request, *args, **kwargs)
 
+@swagger_auto_schema(
+    method='post',
+    operation_description="Log out everywhere by revoking every token issued to the current user",
+    responses={200: openapi.Response(description="All tokens revoked")}
+)
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def logout_all(request):
+    """Revoke every access and refresh token of the current user"""
+    get_user_instance(request.user).revoke_tokens()
+    
+    return Response({'message': 'Logged out from all sessions'}, status=status.HTTP_200_OK)
+
 class RegistrationView(generics.CreateAPIView):
     """Public registration endpoint - creates user role only"""
     queryset = User.objects.all()
     serializer_class = RegistrationSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'register'
     
     @swagger_auto_schema(
         operation_description="Register a new user (automatically assigned 'user' role)",
@@ -118,13 +145,99 @@ class AdminUserCreateView(generics.CreateAPIView):
             'message': f'{user.role.title()} created successfully'
         }, status=status.HTTP_201_CREATED)
 
-class UserProfileView(generics.RetrieveUpdateAPIView):
+class BulkUserCreateView(generics.GenericAPIView):
+    """Admin-only bulk provisioning of editors and users from JSON or CSV"""
+    queryset = User.objects.all()
+    permission_classes = [IsAdmin]
+    
+    @swagger_auto_schema(
+        operation_description=(
+            "Create many users at once. Send a JSON list (or {\"users\": [...]}) "
+            "or upload a CSV/JSON file as 'file'. Add ?dry_run=true to only validate."
+        ),
+        responses={201: 'All rows created', 207: 'Some rows rejected', 400: 'No rows created'}
+    )
+    def post(self, request, *args, **kwargs):
+        upload = request.FILES.get('file')
+        try:
+            if upload is not None:
+                rows = parse_rows(upload.read().decode('utf-8-sig'), upload.name)
+            else:
+                rows = request.data.get('users') if isinstance(request.data, dict) else request.data
+                if not isinstance(rows, list):
+                    raise ValueError('Expected a list of users')
+        except (ValueError, UnicodeDecodeError) as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Every row costs a full password hash inside this request
+        max_rows = getattr(settings, 'USER_PROVISIONING_MAX_ROWS', 50)
+        if len(rows) > max_rows:
+            return Response({
+                'error': f'At most {max_rows} users per request; use the provision_users command for larger batches'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        dry_run = request.query_params.get('dry_run', '').lower() in ('1', 'true', 'yes')
+        # Hash inline: a process pool per request would compete with the other workers
+        results = provision_users(rows, workers=1, dry_run=dry_run, sender=self.__class__)
+        
+        accepted = sum(1 for result in results if result['status'] != 'invalid')
+        if accepted == len(results) and results:
+            response_status = status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED
+        elif accepted:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        
+        return Response({
+            'total': len(results),
+            'accepted': accepted,
+            'rejected': len(results) - accepted,
+            'dry_run': dry_run,
+            'results': results,
+        }, status=response_status)
+
+def profile_etag(user):
+    # Users have no updated_at, so hash the profile fields themselves
+    return make_etag(
+        'user', user.pk, user.email, user.full_name, user.role,
+        user.is_active, user.date_joined.isoformat()
+    )
+
+class UserProfileView(ConditionalRequestMixin, generics.RetrieveUpdateAPIView):
     """View own profile (authenticated users)"""
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_object(self):
-        return self.request.user
+        if getattr(self, 'locked_user', None) is not None:
+            return self.locked_user
+        # Claim-backed users only hit the database here, when the row is needed
+        return get_user_instance(self.request.user)
+    
+    def get_etag(self, user):
+        return profile_etag(user)
+    
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag = self.get_etag(instance)
+        not_modified = self.check_preconditions(request, etag)
+        if not_modified is not None:
+            return not_modified
+        
+        response = Response(self.get_serializer(instance).data)
+        return self.set_validators(response, etag)
+    
+    def update(self, request, *args, **kwargs):
+        if not self.has_write_preconditions(request):
+            response = super().update(request, *args, **kwargs)
+            return self.set_validators(response, self.get_etag(self.get_object()))
+        
+        with transaction.atomic():
+            # Re-read the row under a lock: the authenticated copy may be stale
+            self.locked_user = User.objects.select_for_update().get(pk=request.user.pk)
+            self.check_preconditions(request, self.get_etag(self.locked_user))
+            response = super().update(request, *args, **kwargs)
+        return self.set_validators(response, self.get_etag(self.get_object()))
     
     @swagger_auto_schema(
         operation_description="Get current user's profile",
@@ -145,6 +258,7 @@ class AdminProfilesListView(generics.ListAPIView):
     queryset = User.objects.all()
     serializer_class = UserListSerializer
     permission_classes = [IsAdmin]
+    pagination_class = UserCursorPagination
     
     @swagger_auto_schema(
         operation_description="Admin views all user profiles",
@@ -153,6 +267,40 @@ class AdminProfilesListView(generics.ListAPIView):
     def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
 
+class UserExportView(generics.GenericAPIView):
+    """Admin-only streaming export of users as NDJSON or CSV"""
+    queryset = User.objects.all()
+    permission_classes = [IsAdmin]
+    export_fields = ['id', 'email', 'full_name', 'role', 'is_active', 'date_joined', 'last_login']
+    
+    @swagger_auto_schema(
+        operation_description="Stream all users (filters: role, joined_after, joined_before; resume with after_id)",
+        manual_parameters=[
+            openapi.Parameter('output', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=['ndjson', 'csv']),
+            openapi.Parameter('role', openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter('joined_after', openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter('joined_before', openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter('after_id', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+        ]
+    )
+    def get(self, request, *args, **kwargs):
+        params = request.query_params
+        queryset = User.objects.all()
+        
+        if params.get('role'):
+            queryset = queryset.filter(role=params['role'])
+        joined_after = parse_boundary(params.get('joined_after'), 'joined_after')
+        if joined_after:
+            queryset = queryset.filter(date_joined__gte=joined_after)
+        joined_before = parse_boundary(params.get('joined_before'), 'joined_before')
+        if joined_before:
+            queryset = queryset.filter(date_joined__lt=joined_before)
+        after_id = parse_after_id(request)
+        if after_id is not None:
+            queryset = queryset.filter(id__gt=after_id)
+        
+        return stream_rows(queryset, self.export_fields, params.get('output', 'ndjson'))
+
 @swagger_auto_schema(
     method='get',
     operation_description="Admin dashboard with system statistics",
@@ -168,7 +316,9 @@ class AdminProfilesListView(generics.ListAPIView):
                     "recent_registrations": 10,
                     "total_posts": 50,
                     "pending_posts": 5,
-                    "approved_posts": 40
+                    "approved_posts": 40,
+                    "rejected_posts": 5,
+                    "generated_at": "2025-07-18T06:29:00+00:00"
                 }
             }
         )
@@ -177,22 +327,8 @@ class AdminProfilesListView(generics.ListAPIView):
 @api_view(['GET'])
 @permission_classes([IsAdmin])
 def admin_dashboard(request):
-    """Admin dashboard with system statistics"""
-    from posts.models import Post
-    
-    stats = {
-        'total_users': User.objects.filter(role='user').count(),
-        'total_editors': User.objects.filter(role='editor').count(),
-        'total_admins': User.objects.filter(role='admin').count(),
-        'active_users': User.objects.filter(is_active=True).count(),
-        'recent_registrations': User.objects.filter(
-            date_joined__gte=timezone.now() - timedelta(days=7)
-        ).count(),
-        'total_posts': Post.objects.count(),
-        'pending_posts': Post.objects.filter(status='pending').count(),
-        'approved_posts': Post.objects.filter(status='approved').count(),
-        'rejected_posts': Post.objects.filter(status='rejected').count(),
-    }
+    """Admin dashboard with system statistics (served from a shared snapshot)"""
+    stats = get_admin_stats()
     
     return Response(stats, status=status.HTTP_200_OK)
 
@@ -218,29 +354,45 @@ def admin_dashboard(request):
 @permission_classes([IsEditorOrAdmin])
 def editor_dashboard(request):
     """Editor dashboard with tasks and stats"""
-    from posts.models import Post
+    from posts.models import AuthorPostStats, Post
     
-    user_posts = Post.objects.filter(author=request.user)
+    # Denormalized counters: one primary-key read instead of four COUNT(*)s
+    counters = AuthorPostStats.objects.filter(author_id=request.user.pk).first()
+    if counters is None:
+        counters = AuthorPostStats.rebuild_for(request.user.pk)
     
     # Get recent posts by current user
-    recent_posts = user_posts.order_by('-created_at')[:5]
+    recent_posts = Post.objects.filter(author_id=request.user.pk).order_by('-created_at').values(
+        'id', 'title', 'status', 'created_at'
+    )[:5]
     recent_posts_data = []
     for post in recent_posts:
         recent_posts_data.append({
-            'id': post.id,
-            'title': post.title,
-            'status': post.status,
-            'created_at': post.created_at.isoformat(),
+            'id': post['id'],
+            'title': post['title'],
+            'status': post['status'],
+            'created_at': post['created_at'].isoformat(),
         })
     
     stats = {
         'message': 'Editor dashboard loaded successfully',
-        'my_posts': user_posts.count(),
-        'pending_posts': user_posts.filter(status='pending').count(),
-        'approved_posts': user_posts.filter(status='approved').count(),
-        'rejected_posts': user_posts.filter(status='rejected').count(),
+        'my_posts': counters.total_posts,
+        'pending_posts': counters.pending_posts,
+        'approved_posts': counters.approved_posts,
+        'rejected_posts': counters.rejected_posts,
         'recent_posts': recent_posts_data,
         'user_role': request.user.role
     }
     
-    return Response(stats, status=status.HTTP_200_OK)
\ No newline at end of file
+    return Response(stats, status=status.HTTP_200_OK)
+
+@swagger_auto_schema(
+    method='get',
+    operation_description="Prometheus metrics: request counts and latency per URL name, auth failures, login/refresh outcomes, cache hit ratios",
+    responses={200: 'text/plain; version=0.0.4'}
+)
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def metrics(request):
+    """Prometheus scrape endpoint (admin only)"""
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')